@@ -0,0 +1,6 @@
+"""Offline benchmarks for the Spotnere API.
+
+Run from the backend directory with ``python -m bench --help``. The suite
+starts local stand-ins for PostgREST and Razorpay, so nothing talks to the
+real services. See bench/README.md.
+"""
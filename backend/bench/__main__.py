@@ -0,0 +1,72 @@
+"""Command line entry point: python -m bench {micro,load} [options]."""
+
+import argparse
+import asyncio
+import sys
+
+from bench import load, micro, stats
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m bench", description=__doc__)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def common(p: argparse.ArgumentParser) -> None:
+        p.add_argument("--scale", type=int, default=2000, help="number of synthetic places (default 2000)")
+        p.add_argument("--seed", type=int, default=42, help="dataset seed (default 42)")
+        p.add_argument("--save", metavar="PATH", help="write results as JSON, e.g. to use as a baseline")
+        p.add_argument("--compare", metavar="PATH", help="compare with a saved baseline")
+        p.add_argument("--threshold", type=float, default=0.10,
+                       help="relative change counted as a regression (default 0.10)")
+
+    m = sub.add_parser("micro", help="time hashing, sitemap and OG rendering helpers in-process")
+    common(m)
+    m.add_argument("--iterations", type=int, default=100, help="base iteration count (default 100)")
+    m.add_argument("--only", help="comma-separated subset: hash_password,verify_password,render_og_html,build_sitemap")
+
+    l = sub.add_parser("load", help="drive HTTP scenarios against a local API")
+    common(l)
+    l.add_argument("--scenarios", default=",".join(load.SCENARIOS),
+                   help=f"comma-separated subset of {','.join(load.SCENARIOS)}")
+    l.add_argument("--concurrency", type=int, default=20, help="concurrent clients (default 20)")
+    l.add_argument("--duration", type=float, default=15, help="measured seconds per scenario (default 15)")
+    l.add_argument("--warmup", type=float, default=3, help="unmeasured seconds per scenario (default 3)")
+    l.add_argument("--workers", type=int, default=1, help="uvicorn workers for the API (default 1)")
+    l.add_argument("--razorpay-latency-ms", type=float, default=0, help="delay added by the fake Razorpay")
+    l.add_argument("--api-url", help="use an already running API instead of starting one (its data must "
+                                     "come from the fake PostgREST with the same --scale/--seed)")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parser().parse_args(argv)
+
+    if args.command == "micro":
+        only = set(args.only.split(",")) if args.only else None
+        results = asyncio.run(micro.run(args.scale, args.seed, args.iterations, only))
+        settings = {"scale": args.scale, "seed": args.seed, "iterations": args.iterations}
+    else:
+        scenarios = [name for name in args.scenarios.split(",") if name]
+        unknown = set(scenarios) - set(load.SCENARIOS)
+        if unknown:
+            print(f"Unknown scenarios: {', '.join(sorted(unknown))}", file=sys.stderr)
+            return 2
+        results = asyncio.run(load.run(
+            scenarios, args.scale, args.seed, args.concurrency, args.warmup, args.duration,
+            workers=args.workers, razorpay_latency_ms=args.razorpay_latency_ms, api_url=args.api_url,
+        ))
+        settings = {
+            "scale": args.scale, "seed": args.seed, "scenarios": scenarios,
+            "concurrency": args.concurrency, "duration": args.duration, "workers": args.workers,
+        }
+
+    stats.print_table(results)
+    if args.save:
+        stats.save(args.save, args.command, results, settings)
+    if args.compare and stats.compare(args.compare, results, args.threshold):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""Deterministic synthetic data for the fake PostgREST server.
+
+`generate(scale, seed)` always returns the same tables for the same
+arguments, so the load runner can derive ids, emails and search words
+without asking the server.
+"""
+
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+BENCH_PASSWORD = "bench-password"
+
+CITIES = [
+    ("Goa", "Goa", "India"), ("Pune", "Maharashtra", "India"), ("Mumbai", "Maharashtra", "India"),
+    ("Bengaluru", "Karnataka", "India"), ("Mysuru", "Karnataka", "India"), ("Jaipur", "Rajasthan", "India"),
+    ("Udaipur", "Rajasthan", "India"), ("Kochi", "Kerala", "India"), ("Hyderabad", "Telangana", "India"),
+    ("Chennai", "Tamil Nadu", "India"), ("Delhi", "Delhi", "India"), ("Shimla", "Himachal Pradesh", "India"),
+]
+CATEGORIES = {
+    "Food": ["Cafe", "Restaurant", "Street Food", "Bakery"],
+    "Nature": ["Beach", "Lake", "Waterfall", "Park"],
+    "Culture": ["Museum", "Temple", "Fort", "Gallery"],
+    "Nightlife": ["Bar", "Club", "Lounge"],
+    "Adventure": ["Trek", "Rafting", "Paragliding"],
+}
+NAME_WORDS = [
+    "Sunset", "Royal", "Hidden", "Blue", "Golden", "Lotus", "Monsoon", "Spice", "Coral",
+    "Emerald", "Silver", "Misty", "Palm", "Saffron", "Cedar", "Harbour", "Velvet", "Amber",
+]
+NAME_NOUNS = ["Point", "Garden", "House", "Corner", "Terrace", "Retreat", "Bay", "Hill", "Court", "Market"]
+FIRST_NAMES = ["Aarav", "Diya", "Kabir", "Meera", "Rohan", "Anaya", "Ishaan", "Sara", "Vihaan", "Zoya"]
+LAST_NAMES = ["Sharma", "Iyer", "Khan", "Patel", "Reddy", "Das", "Singh", "Menon", "Rao", "Gupta"]
+
+BASE_TIME = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def user_email(index: int) -> str:
+    return f"bench{index}@example.com"
+
+
+def generate(scale: int = 2000, seed: int = 42, password_hash: str = "") -> dict[str, list[dict]]:
+    """Build every table: `scale` places, scale // 4 users (at least 10),
+    about five favorites and two bookings per user, three images per place."""
+    rng = random.Random(seed)
+    places = []
+    for i in range(scale):
+        city, state, country = rng.choice(CITIES)
+        category = rng.choice(list(CATEGORIES))
+        updated = BASE_TIME + timedelta(minutes=rng.randrange(0, 200_000))
+        place_id = _uuid(rng)
+        places.append({
+            "id": place_id,
+            "name": f"{rng.choice(NAME_WORDS)} {rng.choice(NAME_NOUNS)} {i}",
+            "category": category,
+            "sub_category": rng.choice(CATEGORIES[category]),
+            "description": f"A {category.lower()} spot in {city} loved by locals and travellers alike.",
+            "banner_image_link": f"https://images.example.com/places/{place_id}/banner.jpg",
+            "rating": round(rng.uniform(2.5, 5.0), 1),
+            "review_count": rng.randrange(0, 5000),
+            # include paise so bookings exercise rupee -> paise conversion
+            "avg_price": rng.choice([0, 150, 300, 500, 800, 1200, 2500, 10.29, 1.14, 99.99, 349.5, 1149.75]),
+            "address": f"{rng.randrange(1, 500)} Main Road",
+            "city": city,
+            "state": state,
+            "country": country,
+            "postal_code": str(rng.randrange(100000, 999999)),
+            "latitude": round(rng.uniform(8.0, 32.0), 6),
+            "longitude": round(rng.uniform(70.0, 88.0), 6),
+            "hours": "09:00-21:00",
+            "visible": rng.random() < 0.95,
+            "updated_at": updated.isoformat(),
+            "last_updated": updated.isoformat(),
+        })
+
+    users = []
+    for i in range(max(10, scale // 4)):
+        users.append({
+            "id": _uuid(rng),
+            "email": user_email(i),
+            "password_hash": password_hash,
+            "first_name": rng.choice(FIRST_NAMES),
+            "last_name": rng.choice(LAST_NAMES),
+            "phone_number": f"+91{rng.randrange(7_000_000_000, 9_999_999_999)}",
+            "city": rng.choice(CITIES)[0],
+            "created_at": BASE_TIME.isoformat(),
+        })
+
+    visible_ids = [place["id"] for place in places if place["visible"]]
+    user_places = []
+    bookings = []
+    for user in users:
+        for place_id in rng.sample(visible_ids, min(len(visible_ids), rng.randrange(0, 11))):
+            user_places.append({"id": _uuid(rng), "user_id": user["id"], "fav_place_id": place_id})
+        for _ in range(rng.randrange(0, 5)):
+            when = BASE_TIME + timedelta(days=rng.randrange(-300, 300), hours=rng.randrange(8, 22))
+            guests = rng.randrange(1, 6)
+            bookings.append({
+                "id": _uuid(rng),
+                "user_id": user["id"],
+                "place_id": rng.choice(visible_ids),
+                "booking_date_time": when.isoformat(),
+                "booking_ref_number": f"SPT-{rng.getrandbits(32):08X}",
+                "amount_paid": float(guests * 300),
+                "currency_paid": "INR",
+                "razorpay_order_id": f"order_{rng.getrandbits(64):016x}",
+                "payment_status": "SUCCESS",
+                "booking_status": rng.choice(["CONFIRMED", "CONFIRMED", "CANCELLED", "COMPLETED"]),
+                "number_of_guests": guests,
+                "created_at": (when - timedelta(days=3)).isoformat(),
+            })
+
+    gallery_images = [
+        {"id": _uuid(rng), "place_id": place["id"], "gallery_image_url": f"{place['banner_image_link']}?v={n}"}
+        for place in places
+        for n in range(3)
+    ]
+
+    return {
+        "places": places,
+        "users": users,
+        "user_places": user_places,
+        "bookings": bookings,
+        "gallery_images": gallery_images,
+    }
@@ -0,0 +1,460 @@
+"""In-memory stand-in for the Supabase PostgREST API.
+
+Implements the subset of PostgREST the API uses: column and embedded
+selects (`places!inner(...)`, `place:places(...)`), the eq/neq/gt/gte/lt/
+lte/like/ilike/in/is filters including nested `or=(...)`/`and(...)`,
+multi-key ordering, limit/offset, count via `Prefer: count=...`, single
+object responses, insert/upsert/update/delete and the favorites RPCs from
+sql/favorites.sql.
+
+Run standalone with
+    python -m uvicorn --factory bench.fake_postgrest:create_app --port 54321
+(`BENCH_SCALE` / `BENCH_SEED` choose the dataset).
+"""
+
+import json
+import operator
+import os
+import re
+import uuid
+from datetime import datetime, timezone
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from bench import data
+
+# (table, embedded table) -> foreign key column on `table` referencing embedded.id
+FOREIGN_KEYS = {
+    ("user_places", "places"): "fav_place_id",
+    ("bookings", "places"): "place_id",
+    ("gallery_images", "places"): "place_id",
+}
+# Columns with a lazily built equality index
+INDEXED_COLUMNS = ("id", "user_id", "place_id", "email", "razorpay_order_id", "fav_place_id")
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+# Unique constraints from sql/*.sql
+UNIQUE_KEYS = {
+    "user_places": ("user_id", "fav_place_id"),
+    "bookings": ("razorpay_order_id",),
+}
+
+
+class QueryError(Exception):
+    def __init__(self, message: str, code: str = "PGRST100"):
+        super().__init__(message)
+        self.code = code
+
+
+# ── Parsing ──────────────────────────────────────────────────────────────────
+
+def _split_top_level(text: str) -> list[str]:
+    """Split on commas that are not inside parentheses or double quotes."""
+    parts, depth, quoted, current, escaped = [], 0, False, [], False
+    for char in text:
+        if escaped:
+            current.append(char)
+            escaped = False
+            continue
+        if char == "\\" and quoted:
+            current.append(char)
+            escaped = True
+            continue
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            parts.append("".join(current).strip())
+            current = []
+            continue
+        current.append(char)
+    if current or parts:
+        parts.append("".join(current).strip())
+    return [part for part in parts if part]
+
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return re.sub(r"\\(.)", r"\1", value[1:-1])
+    return value
+
+
+def _parse_condition(column: str, expression: str):
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[4:]
+    op, _, value = expression.partition(".")
+    if op == "in":
+        value = [_unquote(item) for item in _split_top_level(value.strip()[1:-1])]
+    else:
+        value = _unquote(value)
+    return ("cond", column, op, value, negate)
+
+
+def _parse_logic(kind: str, body: str, negate: bool = False):
+    """Parse the inside of or=(...)/and(...) into a nested tree."""
+    children = []
+    for item in _split_top_level(body):
+        nested = re.match(r"^(not\.)?(and|or)\((.*)\)$", item)
+        if nested:
+            children.append(_parse_logic(nested.group(2), nested.group(3), bool(nested.group(1))))
+        else:
+            column, _, expression = item.partition(".")
+            children.append(_parse_condition(column, expression))
+    return (kind, children, negate)
+
+
+def _parse_filters(params) -> tuple[list, dict[str, list]]:
+    """Top-level filters plus filters on embedded resources, keyed by embed name."""
+    filters, embedded = [], {}
+    for key, value in params.multi_items():
+        if key in RESERVED_PARAMS:
+            continue
+        if key in ("or", "and", "not.or", "not.and"):
+            negate = key.startswith("not.")
+            filters.append(_parse_logic(key.removeprefix("not."), value.strip()[1:-1], negate))
+        elif "." in key:
+            embed, _, column = key.partition(".")
+            embedded.setdefault(embed, []).append(_parse_condition(column, value))
+        else:
+            filters.append(_parse_condition(key, value))
+    return filters, embedded
+
+
+def _parse_select(select: str) -> tuple[list[str] | None, list[dict]]:
+    """Columns (None for *) and embed specs from a select string."""
+    columns: list[str] | None = []
+    embeds = []
+    for item in _split_top_level(select or "*"):
+        match = re.match(r"^(?:(\w+):)?(\w+)(!inner|!\w+)?\((.*)\)$", item, re.S)
+        if match:
+            alias, table, hint, inner = match.groups()
+            embeds.append({
+                "name": alias or table,
+                "table": table,
+                "inner": hint == "!inner",
+                "columns": _parse_select(inner)[0],
+            })
+        elif item == "*":
+            columns = None
+        elif columns is not None:
+            columns.append(item.split(":")[-1].split("::")[0])
+    return columns, embeds
+
+
+# ── Evaluation ───────────────────────────────────────────────────────────────
+
+def _coerce(sample, raw: str):
+    if isinstance(sample, bool):
+        return raw.lower() == "true"
+    if isinstance(sample, (int, float)):
+        return float(raw)
+    return raw
+
+
+def _like(pattern: str, value, ignore_case: bool) -> bool:
+    regex = "".join(".*" if char in "%*" else re.escape(char) for char in pattern)
+    return re.fullmatch(regex, str(value), re.I | re.S if ignore_case else re.S) is not None
+
+
+COMPARISONS = {
+    "eq": operator.eq,
+    "neq": operator.ne,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+}
+
+
+def _matches_condition(row: dict, column: str, op: str, value, negate: bool) -> bool:
+    actual = row.get(column)
+    if op == "is":
+        result = {"null": actual is None, "true": actual is True, "false": actual is False}[value.lower()]
+    elif actual is None:
+        result = False
+    elif op == "in":
+        text = str(actual).lower() if isinstance(actual, bool) else str(actual)
+        result = text in value
+    elif op in ("like", "ilike"):
+        result = _like(value, actual, op == "ilike")
+    else:
+        compare = COMPARISONS.get(op)
+        if compare is None:
+            raise QueryError(f"unsupported operator {op}")
+        result = compare(actual, _coerce(actual, value))
+    return result != negate
+
+
+def _matches(row: dict, node) -> bool:
+    if node[0] == "cond":
+        return _matches_condition(row, *node[1:])
+    kind, children, negate = node
+    combine = any if kind == "or" else all
+    return combine(_matches(row, child) for child in children) != negate
+
+
+def _sort(items: list, order: str, row_of=lambda item: item) -> list:
+    """Stable multi-key sort following PostgREST's order=col.desc.nullslast,..."""
+    for term in reversed(_split_top_level(order)):
+        column, *modifiers = term.split(".")
+        desc = "desc" in modifiers
+        nulls_first = "nullsfirst" in modifiers or (desc and "nullslast" not in modifiers)
+        present = [item for item in items if row_of(item).get(column) is not None]
+        missing = [item for item in items if row_of(item).get(column) is None]
+        present.sort(key=lambda item: row_of(item)[column], reverse=desc)
+        items = missing + present if nulls_first else present + missing
+    return items
+
+
+def _project(row: dict, columns: list[str] | None) -> dict:
+    if columns is None:
+        return dict(row)
+    return {column: row.get(column) for column in columns}
+
+
+# ── Store ────────────────────────────────────────────────────────────────────
+
+class Store:
+    def __init__(self, tables: dict[str, list[dict]]):
+        self.tables = tables
+        self._indexes: dict[tuple[str, str], dict] = {}
+
+    def rows(self, table: str) -> list[dict]:
+        if table not in self.tables:
+            raise QueryError(f'relation "public.{table}" does not exist')
+        return self.tables[table]
+
+    def check_columns(self, table: str, columns: list[str] | None) -> None:
+        """Reject selected columns no row has, as Postgres does for unknown ones."""
+        rows = self.rows(table)
+        if columns is None or not rows:
+            return
+        known = set().union(*rows)
+        for column in columns:
+            if column not in known:
+                raise QueryError(f"column {table}.{column} does not exist", code="42703")
+
+    def changed(self, table: str) -> None:
+        for key in [key for key in self._indexes if key[0] == table]:
+            del self._indexes[key]
+
+    def lookup(self, table: str, column: str, value) -> list[dict]:
+        index = self._indexes.get((table, column))
+        if index is None:
+            index = {}
+            for row in self.rows(table):
+                index.setdefault(str(row.get(column)), []).append(row)
+            self._indexes[(table, column)] = index
+        return index.get(str(value), [])
+
+    def candidates(self, table: str, filters: list) -> list[dict]:
+        """Narrow the scan with an equality index when a filter allows it."""
+        for node in filters:
+            if node[0] == "cond" and node[1] in INDEXED_COLUMNS and not node[4]:
+                _, column, op, value, _ = node
+                if op == "eq":
+                    return self.lookup(table, column, value)
+                if op == "in":
+                    return [row for item in value for row in self.lookup(table, column, item)]
+        return self.rows(table)
+
+    def select(self, table: str, params) -> tuple[list[dict], int]:
+        filters, embedded_filters = _parse_filters(params)
+        columns, embeds = _parse_select(params.get("select", "*"))
+        self.check_columns(table, columns)
+        for embed in embeds:
+            self.check_columns(embed["table"], embed["columns"])
+        rows = [row for row in self.candidates(table, filters) if all(_matches(row, f) for f in filters)]
+
+        results = []
+        for row in rows:
+            out = _project(row, columns)
+            keep = True
+            for embed in embeds:
+                foreign_key = FOREIGN_KEYS.get((table, embed["table"]))
+                if foreign_key is None:
+                    raise QueryError(f"no relationship between {table} and {embed['table']}")
+                targets = self.lookup(embed["table"], "id", row.get(foreign_key))
+                target = targets[0] if targets else None
+                conditions = embedded_filters.get(embed["name"], [])
+                if target is not None and not all(_matches(target, c) for c in conditions):
+                    target = None
+                if target is None and embed["inner"]:
+                    keep = False
+                    break
+                out[embed["name"]] = _project(target, embed["columns"]) if target else None
+            if keep:
+                results.append((row, out))
+
+        total = len(results)
+        if "order" in params:
+            results = _sort(results, params["order"], row_of=lambda pair: pair[0])
+        offset = int(params.get("offset", 0))
+        limit = params.get("limit")
+        results = results[offset:offset + int(limit) if limit is not None else None]
+        return [out for _, out in results], total
+
+    def insert(self, table: str, rows: list[dict], on_conflict: str | None, ignore_duplicates: bool, merge: bool) -> list[dict]:
+        existing = self.rows(table)
+        keys = tuple(on_conflict.split(",")) if on_conflict else UNIQUE_KEYS.get(table)
+        written = []
+        for row in rows:
+            if keys:
+                clash = [
+                    other for other in self.lookup(table, keys[0], row.get(keys[0]))
+                    if all(other.get(key) == row.get(key) for key in keys)
+                ]
+                if clash:
+                    if ignore_duplicates:
+                        continue
+                    if merge:
+                        clash[0].update(row)
+                        written.append(dict(clash[0]))
+                        continue
+                    raise QueryError(f"duplicate key value violates unique constraint on {','.join(keys)}")
+            stored = {"id": str(uuid.uuid4()), "created_at": datetime.now(timezone.utc).isoformat(), **row}
+            existing.append(stored)
+            self.changed(table)
+            written.append(dict(stored))
+        return written
+
+    def update(self, table: str, params, values: dict) -> list[dict]:
+        filters, _ = _parse_filters(params)
+        rows = [row for row in self.candidates(table, filters) if all(_matches(row, f) for f in filters)]
+        for row in rows:
+            row.update(values)
+        self.changed(table)
+        return [dict(row) for row in rows]
+
+    def delete(self, table: str, params) -> list[dict]:
+        filters, _ = _parse_filters(params)
+        doomed = {id(row) for row in self.candidates(table, filters) if all(_matches(row, f) for f in filters)}
+        kept, removed = [], []
+        for row in self.rows(table):
+            (removed if id(row) in doomed else kept).append(row)
+        self.tables[table] = kept
+        self.changed(table)
+        return removed
+
+    # Functions from sql/favorites.sql
+
+    def toggle_favorite(self, p_user_id: str, p_place_id: str) -> bool:
+        current = [row for row in self.lookup("user_places", "user_id", p_user_id) if row["fav_place_id"] == p_place_id]
+        if current:
+            removed = {id(row) for row in current}
+            self.tables["user_places"] = [row for row in self.tables["user_places"] if id(row) not in removed]
+            self.changed("user_places")
+            return False
+        self.insert("user_places", [{"user_id": p_user_id, "fav_place_id": p_place_id}], None, True, False)
+        return True
+
+    def sync_favorites(self, p_user_id: str, p_add=(), p_remove=()) -> list[dict]:
+        remove = set(p_remove)
+        self.tables["user_places"] = [
+            row for row in self.tables["user_places"]
+            if not (row["user_id"] == p_user_id and row["fav_place_id"] in remove)
+        ]
+        self.changed("user_places")
+        self.insert("user_places", [{"user_id": p_user_id, "fav_place_id": pid} for pid in p_add], None, True, False)
+        return [{"fav_place_id": row["fav_place_id"]} for row in self.lookup("user_places", "user_id", p_user_id)]
+
+
+# ── HTTP layer ───────────────────────────────────────────────────────────────
+
+def _error(status: int, message: str, code: str = "PGRST000", details: str | None = None) -> JSONResponse:
+    return JSONResponse({"code": code, "message": message, "details": details, "hint": None}, status_code=status)
+
+
+def _prefer(request: Request) -> dict[str, str]:
+    prefs = {}
+    for item in request.headers.get("prefer", "").split(","):
+        key, _, value = item.strip().partition("=")
+        if key:
+            prefs[key] = value
+    return prefs
+
+
+def _rows_response(request: Request, rows: list[dict], total: int | None, status: int = 200) -> Response:
+    prefs = _prefer(request)
+    if "application/vnd.pgrst.object+json" in request.headers.get("accept", ""):
+        if len(rows) != 1:
+            return _error(406, "JSON object requested, multiple (or no) rows returned", "PGRST116",
+                          f"The result contains {len(rows)} rows")
+        body = rows[0]
+    else:
+        body = rows
+    headers = {}
+    if "count" in prefs or request.method in ("GET", "HEAD"):
+        offset = int(request.query_params.get("offset", 0))
+        total_text = str(total) if "count" in prefs and total is not None else "*"
+        span = f"{offset}-{offset + len(rows) - 1}" if rows else "*"
+        headers["content-range"] = f"{span}/{total_text}"
+    if prefs.get("return") == "minimal" and request.method != "GET":
+        return Response(status_code=status, headers=headers)
+    if request.method == "HEAD":
+        return Response(status_code=status, headers=headers)
+    return Response(json.dumps(body), status_code=status, headers=headers, media_type="application/json")
+
+
+def create_app(scale: int | None = None, seed: int | None = None, password_hash: str | None = None) -> Starlette:
+    """Build a fake PostgREST app over a freshly generated dataset."""
+    scale = int(os.getenv("BENCH_SCALE", "2000")) if scale is None else scale
+    seed = int(os.getenv("BENCH_SEED", "42")) if seed is None else seed
+    if password_hash is None:
+        password_hash = os.getenv("BENCH_PASSWORD_HASH") or _bench_password_hash()
+    store = Store(data.generate(scale, seed, password_hash))
+
+    async def table_endpoint(request: Request) -> Response:
+        table = request.path_params["table"]
+        params = request.query_params
+        try:
+            if request.method in ("GET", "HEAD"):
+                rows, total = store.select(table, params)
+                return _rows_response(request, rows, total)
+            if request.method == "POST":
+                payload = await request.json()
+                rows = payload if isinstance(payload, list) else [payload]
+                resolution = _prefer(request).get("resolution", "")
+                written = store.insert(
+                    table, rows, params.get("on_conflict"),
+                    ignore_duplicates=resolution == "ignore-duplicates",
+                    merge=resolution == "merge-duplicates",
+                )
+                return _rows_response(request, written, len(written), status=201)
+            if request.method == "PATCH":
+                rows = store.update(table, params, await request.json())
+                return _rows_response(request, rows, len(rows))
+            if request.method == "DELETE":
+                rows = store.delete(table, params)
+                return _rows_response(request, rows, len(rows))
+        except QueryError as e:
+            status = 409 if "duplicate key" in str(e) else 400
+            return _error(status, str(e), "23505" if status == 409 else e.code)
+        return _error(405, "method not allowed")
+
+    async def rpc_endpoint(request: Request) -> Response:
+        function = getattr(store, request.path_params["function"], None)
+        if function is None or request.path_params["function"] not in ("toggle_favorite", "sync_favorites"):
+            return _error(404, "Could not find the function", "PGRST202")
+        args = await request.json() if await request.body() else {}
+        return JSONResponse(function(**args))
+
+    app = Starlette(routes=[
+        Route("/rest/v1/rpc/{function}", rpc_endpoint, methods=["POST"]),
+        Route("/rest/v1/{table}", table_endpoint, methods=["GET", "HEAD", "POST", "PATCH", "DELETE"]),
+    ])
+    app.state.store = store
+    return app
+
+
+def _bench_password_hash() -> str:
+    """Hash BENCH_PASSWORD with the API's own configured scheme (done once)."""
+    from main import _hash_password
+
+    return _hash_password(data.BENCH_PASSWORD)
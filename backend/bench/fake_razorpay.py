@@ -0,0 +1,85 @@
+"""In-memory stand-in for the Razorpay Orders API.
+
+Serves POST /v1/orders, GET /v1/orders?receipt=... and GET /v1/orders/{id},
+which is everything RazorpayGateway uses. FAKE_RAZORPAY_LATENCY_MS adds a
+fixed delay per call and FAKE_RAZORPAY_ERROR_RATE makes that fraction of
+order creations fail with a 502, to exercise retries and the breaker.
+
+Run standalone with
+    python -m uvicorn --factory bench.fake_razorpay:create_app --port 54322
+"""
+
+import asyncio
+import os
+import random
+import secrets
+import time
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+
+def _error(status: int, code: str, description: str) -> JSONResponse:
+    return JSONResponse({"error": {"code": code, "description": description}}, status_code=status)
+
+
+def create_app(latency_ms: float | None = None, error_rate: float | None = None) -> Starlette:
+    latency = (float(os.getenv("FAKE_RAZORPAY_LATENCY_MS", "0")) if latency_ms is None else latency_ms) / 1000
+    error_rate = float(os.getenv("FAKE_RAZORPAY_ERROR_RATE", "0")) if error_rate is None else error_rate
+    orders: dict[str, dict] = {}
+    by_receipt: dict[str, list[dict]] = {}
+
+    async def delay() -> None:
+        if latency:
+            await asyncio.sleep(latency)
+
+    async def create_order(request: Request) -> JSONResponse:
+        await delay()
+        payload = await request.json()
+        if not isinstance(payload.get("amount"), int) or payload["amount"] < 100:
+            return _error(400, "BAD_REQUEST_ERROR", "The amount must be atleast INR 1.00")
+        if random.random() < error_rate:
+            return _error(502, "GATEWAY_ERROR", "Injected failure")
+        order = {
+            "id": f"order_{secrets.token_hex(7)}",
+            "entity": "order",
+            "amount": payload["amount"],
+            "amount_paid": 0,
+            "amount_due": payload["amount"],
+            "currency": payload.get("currency", "INR"),
+            "receipt": payload.get("receipt"),
+            "status": "created",
+            "attempts": 0,
+            "notes": payload.get("notes") or {},
+            "created_at": int(time.time()),
+        }
+        orders[order["id"]] = order
+        by_receipt.setdefault(order["receipt"], []).append(order)
+        return JSONResponse(order)
+
+    async def list_orders(request: Request) -> JSONResponse:
+        await delay()
+        receipt = request.query_params.get("receipt")
+        items = by_receipt.get(receipt, []) if receipt else list(orders.values())[-10:]
+        return JSONResponse({"entity": "collection", "count": len(items), "items": items})
+
+    async def fetch_order(request: Request) -> JSONResponse:
+        await delay()
+        order = orders.get(request.path_params["order_id"])
+        if order is None:
+            return _error(400, "BAD_REQUEST_ERROR", "The id provided does not exist")
+        return JSONResponse(order)
+
+    async def orders_endpoint(request: Request) -> JSONResponse:
+        if request.method == "POST":
+            return await create_order(request)
+        return await list_orders(request)
+
+    app = Starlette(routes=[
+        Route("/v1/orders", orders_endpoint, methods=["GET", "POST"]),
+        Route("/v1/orders/{order_id}", fetch_order, methods=["GET"]),
+    ])
+    app.state.orders = orders
+    return app
@@ -0,0 +1,242 @@
+"""Load scenarios against a locally started API.
+
+The fake PostgREST server, the fake Razorpay server and the API itself run
+as uvicorn subprocesses on free localhost ports. Clients drive one scenario
+at a time with a fixed number of concurrent workers, for a warm-up period
+followed by a measured period.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import os
+import random
+import secrets
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+
+from bench import data
+from bench.stats import summarize
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+RAZORPAY_KEY_SECRET = "bench-razorpay-secret"
+SCENARIOS = ("browse", "search", "login", "booking")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _uvicorn(target: str, port: int, env: dict, factory: bool = False, workers: int = 1) -> subprocess.Popen:
+    command = [sys.executable, "-m", "uvicorn", target, "--host", "127.0.0.1", "--port", str(port),
+               "--log-level", "warning", "--no-access-log"]
+    if factory:
+        command.append("--factory")
+    if workers > 1:
+        command += ["--workers", str(workers)]
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env={**os.environ, **env})
+
+
+def _wait_ready(url: str, timeout: float = 120) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=2)
+            return
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+
+@contextmanager
+def local_stack(scale: int, seed: int, workers: int, razorpay_latency_ms: float):
+    """Start the fakes and the API; yields the API base URL."""
+    import main
+
+    password_hash = main._hash_password(data.BENCH_PASSWORD)
+    postgrest_port, razorpay_port, api_port = _free_port(), _free_port(), _free_port()
+    processes = []
+    try:
+        processes.append(_uvicorn(
+            "bench.fake_postgrest:create_app", postgrest_port, factory=True,
+            env={"BENCH_SCALE": str(scale), "BENCH_SEED": str(seed), "BENCH_PASSWORD_HASH": password_hash},
+        ))
+        processes.append(_uvicorn(
+            "bench.fake_razorpay:create_app", razorpay_port, factory=True,
+            env={"FAKE_RAZORPAY_LATENCY_MS": str(razorpay_latency_ms)},
+        ))
+        _wait_ready(f"http://127.0.0.1:{postgrest_port}/rest/v1/places?limit=1")
+        _wait_ready(f"http://127.0.0.1:{razorpay_port}/v1/orders")
+
+        processes.append(_uvicorn("main:app", api_port, workers=workers, env={
+            "SUPABASE_URL": f"http://127.0.0.1:{postgrest_port}",
+            "SUPABASE_KEY": "bench",
+            "RAZORPAY_API_BASE_URL": f"http://127.0.0.1:{razorpay_port}/v1",
+            "RAZORPAY_KEY_ID": "rzp_test_bench",
+            "RAZORPAY_KEY_SECRET": RAZORPAY_KEY_SECRET,
+            "JWT_SECRET": "bench-jwt-secret-with-at-least-32-bytes",
+            # every simulated client shares one IP; measure the handlers, not the limiter
+            "RATE_LIMIT_BACKEND": os.getenv("RATE_LIMIT_BACKEND", "none"),
+        }))
+        _wait_ready(f"http://127.0.0.1:{api_port}/health")
+        yield f"http://127.0.0.1:{api_port}"
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.enabled = False
+
+    async def request(self, client: httpx.AsyncClient, scenario: str, label: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            response, ok = None, False
+        elapsed = time.perf_counter() - started
+        if self.enabled:
+            for name in (f"load:{scenario}", f"load:{scenario}:{label}"):
+                self.latencies[name].append(elapsed)
+                if not ok:
+                    self.errors[name] += 1
+        return response if ok else None
+
+
+class Dataset:
+    """What the scenarios need to know about the seeded tables."""
+
+    def __init__(self, scale: int, seed: int):
+        tables = data.generate(scale, seed)
+        visible = [place for place in tables["places"] if place["visible"]]
+        self.place_ids = [place["id"] for place in visible]
+        self.bookable = [place for place in visible if place["avg_price"]]
+        self.words = sorted({word for place in visible for word in place["name"].split() if not word.isdigit()})
+        self.cities = sorted({place["city"] for place in visible})
+        self.emails = [user["email"] for user in tables["users"]]
+
+
+async def browse(client, recorder: Recorder, dataset: Dataset, state: dict) -> None:
+    offset = random.randrange(0, max(1, len(dataset.place_ids) - 20))
+    await recorder.request(client, "browse", "GET /api/places", "GET", f"/api/places?limit=20&offset={offset}&view=card")
+    place_id = random.choice(dataset.place_ids)
+    await recorder.request(client, "browse", "GET /api/places/{id}", "GET", f"/api/places/{place_id}")
+    await recorder.request(client, "browse", "GET /api/places/{id}/gallery", "GET", f"/api/places/{place_id}/gallery")
+    await recorder.request(client, "browse", "GET /api/places/featured", "GET", "/api/places/featured?view=card")
+
+
+async def search(client, recorder: Recorder, dataset: Dataset, state: dict) -> None:
+    term = random.choice(dataset.words + dataset.cities)
+    await recorder.request(client, "search", "GET /api/places/search", "GET", "/api/places/search", params={"q": term})
+    await recorder.request(client, "search", "GET /api/places/suggest", "GET", "/api/places/suggest", params={"q": term[:3]})
+
+
+async def login(client, recorder: Recorder, dataset: Dataset, state: dict) -> None:
+    await recorder.request(client, "login", "POST /api/auth/login", "POST", "/api/auth/login",
+                           json={"email": random.choice(dataset.emails), "password": data.BENCH_PASSWORD})
+
+
+async def booking(client, recorder: Recorder, dataset: Dataset, state: dict) -> None:
+    if "headers" not in state:
+        response = await client.post("/api/auth/login", json={"email": random.choice(dataset.emails), "password": data.BENCH_PASSWORD})
+        response.raise_for_status()
+        state["headers"] = {"Authorization": f"Bearer {response.json()['token']}"}
+    headers = state["headers"]
+
+    place = random.choice(dataset.bookable)
+    slot = (datetime.now(timezone.utc) + timedelta(days=random.randrange(1, 60))).replace(microsecond=0).isoformat()
+    guests = random.randrange(1, 5)
+    body = {"place_id": place["id"], "booking_date_time": slot, "number_of_guests": guests}
+    order = await recorder.request(client, "booking", "POST /api/bookings", "POST", "/api/bookings", json=body, headers=headers)
+    if order is not None:
+        order = order.json()
+        payment_id = f"pay_{secrets.token_hex(7)}"
+        signature = hmac.new(
+            RAZORPAY_KEY_SECRET.encode(), f"{order['razorpay_order_id']}|{payment_id}".encode(), hashlib.sha256
+        ).hexdigest()
+        await recorder.request(client, "booking", "POST /api/bookings/verify", "POST", "/api/bookings/verify", headers=headers, json={
+            **body,
+            "booking_ref": order["booking_ref"],
+            "amount_paid": order["amount_paid"],
+            "razorpay_order_id": order["razorpay_order_id"],
+            "razorpay_payment_id": payment_id,
+            "razorpay_signature": signature,
+        })
+    await recorder.request(client, "booking", "GET /api/bookings", "GET", "/api/bookings?limit=20&view=list", headers=headers)
+
+
+SCENARIO_FUNCTIONS = {"browse": browse, "search": search, "login": login, "booking": booking}
+
+
+async def _run_scenario(base_url: str, scenario: str, dataset: Dataset, concurrency: int, warmup: float, duration: float) -> dict[str, dict]:
+    recorder = Recorder()
+    step = SCENARIO_FUNCTIONS[scenario]
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        stop_at = time.perf_counter() + warmup + duration
+
+        async def worker() -> None:
+            state: dict = {}
+            while time.perf_counter() < stop_at:
+                await step(client, recorder, dataset, state)
+
+        async def start_measuring() -> float:
+            await asyncio.sleep(warmup)
+            recorder.enabled = True
+            return time.perf_counter()
+
+        measuring = asyncio.create_task(start_measuring())
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - await measuring
+
+    return {
+        name: summarize(latencies, elapsed, recorder.errors[name])
+        for name, latencies in recorder.latencies.items()
+    }
+
+
+async def run(
+    scenarios: list[str],
+    scale: int,
+    seed: int,
+    concurrency: int,
+    warmup: float,
+    duration: float,
+    workers: int = 1,
+    razorpay_latency_ms: float = 0,
+    api_url: str | None = None,
+) -> dict[str, dict]:
+    dataset = Dataset(scale, seed)
+    results: dict[str, dict] = {}
+
+    async def run_all(base_url: str) -> None:
+        for scenario in scenarios:
+            print(f"Running {scenario}: {concurrency} clients, {warmup:.0f}s warm-up + {duration:.0f}s", file=sys.stderr)
+            results.update(await _run_scenario(base_url, scenario, dataset, concurrency, warmup, duration))
+
+    if api_url:
+        await run_all(api_url)
+    else:
+        with local_stack(scale, seed, workers, razorpay_latency_ms) as base_url:
+            await run_all(base_url)
+    return results
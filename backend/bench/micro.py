@@ -0,0 +1,68 @@
+"""Micro-benchmarks for CPU-heavy helpers in main.py.
+
+Each benchmark times individual calls in-process. The sitemap build reads
+from the fake PostgREST app through httpx.ASGITransport, so its numbers
+include the fake's query cost but no sockets.
+"""
+
+import os
+import time
+
+import httpx
+
+from bench import data
+from bench.fake_postgrest import create_app
+from bench.stats import summarize
+
+
+async def _timed(call, iterations: int, is_async: bool) -> list[float]:
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        if is_async:
+            await call()
+        else:
+            call()
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+async def run(scale: int, seed: int, iterations: int, only: set[str] | None) -> dict[str, dict]:
+    import main
+
+    password_hash = main._hash_password(data.BENCH_PASSWORD)
+    fake = create_app(scale, seed, password_hash)
+    places = [row for row in fake.state.store.tables["places"] if row["visible"]]
+
+    os.environ["SUPABASE_URL"] = "http://fake-postgrest"
+    os.environ["SUPABASE_KEY"] = "bench"
+    http = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake), base_url="http://fake-postgrest")
+    main.supabase = await main.get_supabase_client(http)
+
+    place_iter = iter(places * (iterations * 100 // max(len(places), 1) + 1))
+
+    async def build_sitemap():
+        artifact = await main._build_sitemap_artifact(None)
+        main._discard_sitemap_artifact(artifact)
+
+    benchmarks = {
+        # name: (callable, iterations, is_async)
+        "hash_password": (lambda: main._hash_password(data.BENCH_PASSWORD), max(1, iterations // 10), False),
+        "verify_password": (lambda: main._verify_password(data.BENCH_PASSWORD, password_hash), max(1, iterations // 10), False),
+        "render_og_html": (lambda: main._render_og_html(next(place_iter)), iterations * 20, False),
+        "build_sitemap": (build_sitemap, max(1, iterations // 20), True),
+    }
+
+    results = {}
+    try:
+        for name, (call, count, is_async) in benchmarks.items():
+            if only and name not in only:
+                continue
+            await _timed(call, 1, is_async)  # warm-up
+            latencies = await _timed(call, count, is_async)
+            results[f"micro:{name}"] = summarize(latencies, sum(latencies))
+    finally:
+        main.supabase = None
+        await http.aclose()
+    return results
+
@@ -0,0 +1,85 @@
+"""Latency summaries, result files and baseline comparison."""
+
+import json
+import math
+import platform
+import sys
+from datetime import datetime, timezone
+
+# Summary keys where a larger value is a regression
+HIGHER_IS_WORSE = ("p50_ms", "p95_ms", "p99_ms")
+LOWER_IS_WORSE = ("rps",)
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), math.ceil(pct / 100 * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: list[float], elapsed: float, errors: int = 0) -> dict:
+    """p50/p95/p99/mean/max in milliseconds plus throughput for `elapsed` seconds."""
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "errors": errors,
+        "rps": round(len(values) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+    }
+
+
+def print_table(results: dict[str, dict]) -> None:
+    header = f"{'benchmark':<46}{'count':>8}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, row in results.items():
+        print(
+            f"{name:<46}{row['count']:>8}{row['errors']:>8}{row['rps']:>10.1f}"
+            f"{row['p50_ms']:>10.3f}{row['p95_ms']:>10.3f}{row['p99_ms']:>10.3f}"
+        )
+
+
+def save(path: str, kind: str, results: dict[str, dict], settings: dict) -> None:
+    document = {
+        "kind": kind,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "settings": settings,
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2)
+    print(f"\nSaved results to {path}")
+
+
+def compare(path: str, results: dict[str, dict], threshold: float) -> bool:
+    """Print the change against a saved baseline; True if anything regressed
+    by more than `threshold` (a fraction, e.g. 0.1 for 10%)."""
+    with open(path) as f:
+        baseline = json.load(f)["results"]
+
+    regressed = False
+    print(f"\nCompared with {path} (threshold {threshold:.0%}):")
+    print(f"{'benchmark':<46}{'metric':>8}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, row in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<46}{'':>8}{'(new)':>12}")
+            continue
+        for metric in HIGHER_IS_WORSE + LOWER_IS_WORSE:
+            before, after = base.get(metric), row.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            worse = change > threshold if metric in HIGHER_IS_WORSE else change < -threshold
+            regressed |= worse
+            flag = "  REGRESSION" if worse else ""
+            print(f"{name:<46}{metric:>8}{before:>12.3f}{after:>12.3f}{change:>+10.1%}{flag}")
+    return regressed
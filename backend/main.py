@@ -1,27 +1,1378 @@
-from fastapi import FastAPI, HTTPException, Query, Depends, Header
-from fastapi.responses import Response
+from fastapi import FastAPI, HTTPException, Query, Depends, Header, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, EmailStr
-from supabase import create_client, Client
+from starlette.datastructures import MutableHeaders
+from fastapi.routing import APIRoute
+from starlette.routing import Match
+from pydantic import BaseModel, EmailStr, Field
+from supabase import acreate_client, AsyncClient, AsyncClientOptions
+from postgrest.exceptions import APIError
 from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict, defaultdict
+from contextlib import asynccontextmanager
+from typing import Literal
+import asyncio
+import base64
+import bisect
+import copy
+import functools
+import heapq
+import inspect
+import itertools
+import json
+import logging
+import logging.config
+import math
 import os
+import re
+import shutil
+import signal
+import tempfile
+import threading
+import time
+import unicodedata
+import zlib
 import hashlib
 import hmac
+import httpx
 import jwt
-import razorpay
+import orjson
 from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qsl
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # optional: only needed for RESPONSE_CACHE_BACKEND=redis / RATE_LIMIT_BACKEND=redis
+    aioredis = None
+
+try:
+    import brotli
+except ImportError:  # optional: enables Content-Encoding: br
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional: enables Content-Encoding: zstd
+    zstandard = None
 
 # Load environment variables from .env file
 load_dotenv()
 
+logger = logging.getLogger("spotnere.api")
+
+
+# ── Supabase data-access layer ───────────────────────────────────────────────
+#
+# Every endpoint talks to PostgREST through one async Supabase client that
+# shares a single pooled httpx.AsyncClient, so a slow round trip only parks
+# the awaiting request instead of blocking the event loop for everyone.
+
+SUPABASE_POOL_MAX_CONNECTIONS = int(os.getenv("SUPABASE_POOL_MAX_CONNECTIONS", "100"))
+SUPABASE_POOL_MAX_KEEPALIVE = int(os.getenv("SUPABASE_POOL_MAX_KEEPALIVE", "20"))
+SUPABASE_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY_SECONDS", "30"))
+SUPABASE_CONNECT_TIMEOUT_SECONDS = float(os.getenv("SUPABASE_CONNECT_TIMEOUT_SECONDS", "5"))
+SUPABASE_TIMEOUT_SECONDS = float(os.getenv("SUPABASE_TIMEOUT_SECONDS", "30"))
+SUPABASE_HTTP2 = os.getenv("SUPABASE_HTTP2", "true").lower() in ("1", "true", "yes")
+
+# Set during app startup by the lifespan handler below.
+supabase: AsyncClient | None = None
+_supabase_http: httpx.AsyncClient | None = None
+
+
+def _create_supabase_http_client() -> httpx.AsyncClient:
+    """Create the shared, pooled HTTP client used for all PostgREST calls."""
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=SUPABASE_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=SUPABASE_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        timeout=httpx.Timeout(
+            SUPABASE_TIMEOUT_SECONDS, connect=SUPABASE_CONNECT_TIMEOUT_SECONDS
+        ),
+        http2=SUPABASE_HTTP2,
+        follow_redirects=True,
+    )
+
+
+async def get_supabase_client(http_client: httpx.AsyncClient) -> AsyncClient:
+    """Create and return an async Supabase client bound to `http_client`"""
+    supabase_url = os.getenv("SUPABASE_URL")
+    supabase_key = os.getenv("SUPABASE_KEY")
+
+    if not supabase_url:
+        raise ValueError("SUPABASE_URL environment variable is not set")
+    if not supabase_key:
+        raise ValueError("SUPABASE_KEY environment variable is not set")
+
+    return await acreate_client(
+        supabase_url,
+        supabase_key,
+        options=AsyncClientOptions(httpx_client=http_client),
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the shared Supabase and Razorpay connection pools on startup, close them on shutdown."""
+    global supabase, _supabase_http, _password_executor
+
+    _supabase_http = _create_supabase_http_client()
+    _password_executor = _create_password_executor()
+    _instrument_http_client(_supabase_http, "supabase", _supabase_operation)
+    razorpay_gateway.open()
+    background_tasks: list[asyncio.Task] = []
+    try:
+        supabase = await get_supabase_client(_supabase_http)
+        _install_drain_handler()
+        if PRELOAD_PLACE_CATALOG:
+            await _load_place_catalog()
+        else:
+            background_tasks.append(asyncio.create_task(_load_place_catalog()))
+        if PRELOAD_SITEMAP:
+            await sitemap_artifact.refresh()
+        background_tasks.append(asyncio.create_task(place_catalog.run_refresher()))
+        background_tasks.append(asyncio.create_task(
+            sitemap_artifact.run(initial_delay=sitemap_artifact.interval if PRELOAD_SITEMAP else 0)
+        ))
+        background_tasks.append(asyncio.create_task(webhook_queue.run()))
+        background_tasks.append(asyncio.create_task(_monitor_event_loop_lag()))
+        yield
+        await webhook_queue.drain(WEBHOOK_DRAIN_SECONDS)
+    finally:
+        for task in background_tasks:
+            task.cancel()
+        await asyncio.gather(*background_tasks, return_exceptions=True)
+        sitemap_artifact.close()
+        supabase = None
+        await _supabase_http.aclose()
+        _supabase_http = None
+        await razorpay_gateway.aclose()
+        _password_executor.shutdown(wait=False, cancel_futures=True)
+        _password_executor = None
+        if response_cache is not None:
+            await response_cache.aclose()
+        if rate_limit_backend is not None:
+            await rate_limit_backend.aclose()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Spotnere API",
     description="API for Spotnere place discovery platform",
     version="1.0.0",
+    lifespan=lifespan,
+)
+
+# ── Response encoding ─────────────────────────────────────────────────────────
+#
+# Handlers return plain dicts/lists built from PostgREST rows, so routes
+# render them straight to bytes with orjson instead of walking them through
+# jsonable_encoder first. Bodies above RESPONSE_COMPRESSION_MIN_BYTES are
+# compressed with the best encoding the client accepts (zstd, br, gzip;
+# the first two only when their packages are installed). Cached responses
+# carry pre-compressed variants, which CompressionMiddleware passes through.
+
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+RESPONSE_GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "6"))
+RESPONSE_BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", "5"))
+RESPONSE_ZSTD_LEVEL = int(os.getenv("RESPONSE_ZSTD_LEVEL", "3"))
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/xml", "application/javascript", "image/svg+xml")
+
+
+def _json_body(payload) -> bytes:
+    return orjson.dumps(payload, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return _json_body(content)
+
+
+def _render_plain_json(endpoint, status_code: int | None):
+    """Wrap an async endpoint so dict/list results become FastJSONResponse.
+
+    Headers and status set on an injected `response: Response` parameter are
+    carried over, as FastAPI would do for its own response."""
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        result = await endpoint(*args, **kwargs)
+        if not isinstance(result, (dict, list)):
+            return result
+        response = FastJSONResponse(result, status_code=status_code or 200)
+        for value in kwargs.values():
+            if isinstance(value, Response) and not isinstance(value, FastJSONResponse):
+                if value.status_code:
+                    response.status_code = value.status_code
+                response.raw_headers.extend(
+                    (name, header) for name, header in value.raw_headers if name != b"content-length"
+                )
+        return response
+
+    return wrapper
+
+
+class FastJSONRoute(APIRoute):
+    def __init__(self, path: str, endpoint, **kwargs):
+        if inspect.iscoroutinefunction(endpoint):
+            endpoint = _render_plain_json(endpoint, kwargs.get("status_code"))
+        super().__init__(path, endpoint, **kwargs)
+
+
+app.router.route_class = FastJSONRoute
+app.router.default_response_class = FastJSONResponse
+
+
+def _gzip(body: bytes) -> bytes:
+    compressor = zlib.compressobj(RESPONSE_GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
+
+
+# Available encoders in server preference order
+RESPONSE_ENCODERS = {}
+if zstandard is not None:
+    RESPONSE_ENCODERS["zstd"] = zstandard.ZstdCompressor(level=RESPONSE_ZSTD_LEVEL).compress
+if brotli is not None:
+    RESPONSE_ENCODERS["br"] = functools.partial(brotli.compress, quality=RESPONSE_BROTLI_QUALITY)
+RESPONSE_ENCODERS["gzip"] = _gzip
+
+
+def _negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """Pick the preferred available encoding allowed by Accept-Encoding."""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+    wildcard = weights.get("*", 0.0)
+    for encoding in RESPONSE_ENCODERS:
+        if weights.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+def _precompress(body: bytes) -> dict[str, bytes]:
+    """Every available encoding of `body`, or {} below the size threshold."""
+    if len(body) < RESPONSE_COMPRESSION_MIN_BYTES:
+        return {}
+    return {encoding: encode(body) for encoding, encode in RESPONSE_ENCODERS.items()}
+
+
+def _encoded_etag(etag: str, encoding: str) -> str:
+    """Each content-coding is a distinct representation, so it gets its own tag."""
+    return f'{etag[:-1]}-{encoding}"'
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing single-chunk compressible responses.
+
+    Responses that already set Content-Encoding (pre-compressed cache hits,
+    gzip sitemaps) and streamed bodies are passed through unchanged."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+        encoding = _negotiate_encoding(accept_encoding)
+        start_message = None
+
+        async def send_compressed(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if start_message is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            headers = MutableHeaders(raw=list(start["headers"]))
+            body = message.get("body", b"")
+            compressible = (
+                start["status"] == 200
+                and "content-encoding" not in headers
+                and headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+            )
+            vary = {value.strip().lower() for value in headers.get("vary", "").split(",")}
+            if compressible and "accept-encoding" not in vary:
+                headers.add_vary_header("Accept-Encoding")
+            if compressible and encoding and not message.get("more_body") and len(body) >= RESPONSE_COMPRESSION_MIN_BYTES:
+                body = RESPONSE_ENCODERS[encoding](body)
+                headers["content-encoding"] = encoding
+                headers["content-length"] = str(len(body))
+                if "etag" in headers:
+                    headers["etag"] = _encoded_etag(headers["etag"], encoding)
+                message = {**message, "body": body}
+            await send({**start, "headers": headers.raw})
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+
+# ── Metrics ──────────────────────────────────────────────────────────────────
+#
+# Minimal Prometheus text-format metrics served at /metrics: per-route
+# request counts, latency histograms and in-flight gauges (MetricsMiddleware),
+# per-upstream call timings via httpx event hooks on the Supabase and
+# Razorpay clients, cache counters and event-loop lag.
+
+METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+EVENT_LOOP_LAG_INTERVAL_SECONDS = float(os.getenv("EVENT_LOOP_LAG_INTERVAL_SECONDS", "0.5"))
+
+
+def _metric_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{escaped}"')
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    """A labelled counter or gauge; values are keyed by label-value tuples."""
+
+    def __init__(self, name: str, help_text: str, kind: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.kind = kind
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = defaultdict(float)
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        self._values[labels] += amount
+
+    def dec(self, labels: tuple = (), amount: float = 1) -> None:
+        self._values[labels] -= amount
+
+    def set(self, labels: tuple, value: float) -> None:
+        self._values[labels] = value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_metric_labels(self.labelnames, labels)} {value:g}")
+        return lines
+
+
+class Histogram(Metric):
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = (), buckets=METRICS_LATENCY_BUCKETS):
+        super().__init__(name, help_text, "histogram", labelnames)
+        self.buckets = buckets
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_metric_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_metric_labels(self.labelnames, labels)} {total:g}")
+            lines.append(f"{self.name}_count{_metric_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+http_requests = Metric(
+    "spotnere_http_requests_total", "HTTP requests by route and status.", "counter",
+    ("method", "route", "status"),
+)
+http_latency = Histogram(
+    "spotnere_http_request_duration_seconds", "HTTP request latency by route.", ("method", "route"),
+)
+http_in_flight = Metric(
+    "spotnere_http_requests_in_flight", "HTTP requests currently being served.", "gauge",
+    ("method", "route"),
+)
+upstream_requests = Metric(
+    "spotnere_upstream_requests_total", "Calls to Supabase/Razorpay by target, operation and status.", "counter",
+    ("upstream", "target", "operation", "status"),
+)
+upstream_latency = Histogram(
+    "spotnere_upstream_request_duration_seconds", "Upstream call latency (until response headers).",
+    ("upstream", "target", "operation"),
+)
+event_loop_lag = Histogram(
+    "spotnere_event_loop_lag_seconds", "Delay of a timer on the event loop beyond its deadline.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+
+def _route_template(scope) -> str:
+    """The path template of the route serving `scope`, to keep label cardinality bounded."""
+    partial = None
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path
+    return partial or "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route counts, latency and in-flight requests."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = _route_template(scope)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_in_flight.inc((method, route))
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_latency.observe((method, route), time.perf_counter() - started)
+            http_requests.inc((method, route, str(status)))
+            http_in_flight.dec((method, route))
+
+
+def _supabase_operation(request: httpx.Request) -> tuple[str, str]:
+    path = request.url.path.split("/rest/v1/", 1)[-1]
+    if path.startswith("rpc/"):
+        return path[4:], "rpc"
+    if request.method == "POST":
+        prefer = request.headers.get("prefer", "")
+        return path, "upsert" if "resolution=" in prefer else "insert"
+    return path, {"GET": "select", "HEAD": "count", "PATCH": "update", "DELETE": "delete"}.get(
+        request.method, request.method.lower()
+    )
+
+
+def _razorpay_operation(request: httpx.Request) -> tuple[str, str]:
+    path = re.sub(r"/[a-z]+_[A-Za-z0-9]+", "/{id}", request.url.path)
+    return path, request.method.lower()
+
+
+def _instrument_http_client(client: httpx.AsyncClient, upstream: str, operation) -> None:
+    """Time every call made through `client` into the upstream_* metrics."""
+
+    async def on_request(request: httpx.Request) -> None:
+        request.extensions["metrics_started"] = time.perf_counter()
+
+    async def on_response(response: httpx.Response) -> None:
+        started = response.request.extensions.get("metrics_started")
+        if started is None:
+            return
+        target, op = operation(response.request)
+        upstream_latency.observe((upstream, target, op), time.perf_counter() - started)
+        upstream_requests.inc((upstream, target, op, str(response.status_code)))
+
+    hooks = client.event_hooks
+    hooks["request"].append(on_request)
+    hooks["response"].append(on_response)
+    client.event_hooks = hooks
+
+
+async def _monitor_event_loop_lag() -> None:
+    """Background loop started from the app lifespan."""
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(EVENT_LOOP_LAG_INTERVAL_SECONDS)
+        lag = time.perf_counter() - started - EVENT_LOOP_LAG_INTERVAL_SECONDS
+        event_loop_lag.observe((), max(lag, 0.0))
+
+
+def _cache_metric_lines() -> list[str]:
+    """Hit/miss counters for every cache reported by _cache_stats()."""
+    series = {"hits": [], "misses": [], "hit_ratio": []}
+    for cache, stats in _cache_stats().items():
+        if not stats or "hits" not in stats:
+            continue
+        hits = stats["hits"] + stats.get("stale_hits", 0)
+        series["hits"].append((cache, hits))
+        series["misses"].append((cache, stats["misses"]))
+        if stats.get("hit_ratio") is not None:
+            series["hit_ratio"].append((cache, stats["hit_ratio"]))
+
+    lines = []
+    for key, kind, help_text in (
+        ("hits", "counter", "Cache lookups served from the cache."),
+        ("misses", "counter", "Cache lookups that missed."),
+        ("hit_ratio", "gauge", "Cache hits / lookups since startup."),
+    ):
+        name = f"spotnere_cache_{key}" + ("_total" if kind == "counter" else "")
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        lines += [f"{name}{_metric_labels(('cache',), (cache,))} {value:g}" for cache, value in series[key]]
+    return lines
+
+
+def _render_metrics() -> str:
+    lines = []
+    for metric in (
+        http_requests, http_latency, http_in_flight, upstream_requests, upstream_latency, event_loop_lag,
+        admission_rejections, admission_queue_depth,
+    ):
+        lines += metric.render()
+    lines += _cache_metric_lines()
+    return "\n".join(lines) + "\n"
+
+
+# ── Razorpay gateway ──────────────────────────────────────────────────────────
+#
+# Orders are created over a pooled httpx.AsyncClient with strict timeouts, so
+# a slow gateway only parks the awaiting request. Transient failures are
+# retried a bounded number of times; before re-sending a create that may
+# already have reached Razorpay, the order is looked up by its receipt so a
+# retry never opens a second order. A circuit breaker fails fast while the
+# gateway keeps failing.
+
+RAZORPAY_KEY_ID = os.getenv("RAZORPAY_KEY_ID", "")
+RAZORPAY_KEY_SECRET = os.getenv("RAZORPAY_KEY_SECRET", "")
+RAZORPAY_API_BASE_URL = os.getenv("RAZORPAY_API_BASE_URL", "https://api.razorpay.com/v1")
+RAZORPAY_POOL_MAX_CONNECTIONS = int(os.getenv("RAZORPAY_POOL_MAX_CONNECTIONS", "20"))
+RAZORPAY_CONNECT_TIMEOUT_SECONDS = float(os.getenv("RAZORPAY_CONNECT_TIMEOUT_SECONDS", "3"))
+RAZORPAY_TIMEOUT_SECONDS = float(os.getenv("RAZORPAY_TIMEOUT_SECONDS", "10"))
+RAZORPAY_MAX_RETRIES = int(os.getenv("RAZORPAY_MAX_RETRIES", "2"))
+RAZORPAY_RETRY_BACKOFF_SECONDS = float(os.getenv("RAZORPAY_RETRY_BACKOFF_SECONDS", "0.25"))
+RAZORPAY_BREAKER_FAILURES = int(os.getenv("RAZORPAY_BREAKER_FAILURES", "5"))
+RAZORPAY_BREAKER_RESET_SECONDS = float(os.getenv("RAZORPAY_BREAKER_RESET_SECONDS", "30"))
+
+
+class RazorpayError(Exception):
+    """A failed Razorpay call. `transient` errors are safe to retry."""
+
+    def __init__(self, message: str, status_code: int | None = None, transient: bool = False):
+        super().__init__(message)
+        self.status_code = status_code
+        self.transient = transient
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} circuit is open")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures and rejects calls
+    for `reset_timeout` seconds, then lets a single trial call through."""
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self) -> None:
+        state = self.state
+        if state == "open":
+            remaining = self.reset_timeout - (time.monotonic() - self.opened_at)
+            raise CircuitOpenError(self.name, remaining)
+        if state == "half_open":
+            if self._trial_in_flight:
+                raise CircuitOpenError(self.name, 1)
+            self._trial_in_flight = True
+
+    def record(self, ok: bool) -> None:
+        self._trial_in_flight = False
+        if ok:
+            self.failures = 0
+            self.opened_at = None
+            return
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                logger.warning("%s circuit opened after %d failures", self.name, self.failures)
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {"state": self.state, "consecutive_failures": self.failures}
+
+
+class RazorpayGateway:
+    """Async client for the subset of the Razorpay Orders API we use."""
+
+    def __init__(self, key_id: str, key_secret: str, base_url: str):
+        self.key_id = key_id
+        self._key_secret = key_secret
+        self.base_url = base_url.rstrip("/")
+        self.breaker = CircuitBreaker(
+            "razorpay", RAZORPAY_BREAKER_FAILURES, RAZORPAY_BREAKER_RESET_SECONDS
+        )
+        self._http: httpx.AsyncClient | None = None
+
+    def open(self) -> None:
+        self._http = httpx.AsyncClient(
+            base_url=self.base_url,
+            auth=(self.key_id, self._key_secret),
+            limits=httpx.Limits(
+                max_connections=RAZORPAY_POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=RAZORPAY_POOL_MAX_CONNECTIONS,
+            ),
+            timeout=httpx.Timeout(
+                RAZORPAY_TIMEOUT_SECONDS, connect=RAZORPAY_CONNECT_TIMEOUT_SECONDS
+            ),
+        )
+        _instrument_http_client(self._http, "razorpay", _razorpay_operation)
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def _request(self, method: str, path: str, **kwargs) -> dict:
+        response = await self._http.request(method, path, **kwargs)
+        if response.status_code >= 400:
+            try:
+                description = response.json()["error"]["description"]
+            except Exception:
+                description = response.text[:200]
+            raise RazorpayError(
+                f"{method} {path} returned {response.status_code}: {description}",
+                status_code=response.status_code,
+                transient=response.status_code == 429 or response.status_code >= 500,
+            )
+        return response.json()
+
+    async def _find_order(self, receipt: str) -> dict | None:
+        data = await self._request("GET", "/orders", params={"receipt": receipt})
+        items = data.get("items") or []
+        return items[0] if items else None
+
+    async def _with_retries(self, attempt_call):
+        """Run `attempt_call(maybe_sent)` until it succeeds or retries run out.
+
+        `maybe_sent` is True once an earlier attempt may have reached
+        Razorpay, so non-idempotent calls can check before re-sending."""
+        maybe_sent = False
+        error: Exception | None = None
+        for attempt in range(RAZORPAY_MAX_RETRIES + 1):
+            if attempt:
+                await asyncio.sleep(RAZORPAY_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+            try:
+                return await attempt_call(maybe_sent)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+                # Never reached Razorpay; a plain resend is safe.
+                error = e
+            except httpx.TransportError as e:
+                maybe_sent = True
+                error = e
+            except RazorpayError as e:
+                if not e.transient:
+                    raise
+                maybe_sent = True
+                error = e
+        raise RazorpayError(
+            f"Razorpay unavailable after {RAZORPAY_MAX_RETRIES + 1} attempts: {error!r}",
+            transient=True,
+        )
+
+    async def _guarded(self, attempt_call):
+        """Run a retried call behind the circuit breaker."""
+        self.breaker.before_call()
+        ok = False
+        try:
+            result = await self._with_retries(attempt_call)
+            ok = True
+            return result
+        except RazorpayError as e:
+            # A 4xx means the gateway is up and rejected this request.
+            ok = not e.transient
+            raise
+        finally:
+            self.breaker.record(ok)
+
+    async def create_order(self, payload: dict) -> dict:
+        """Create an order; `payload["receipt"]` must be unique per booking."""
+
+        async def attempt(maybe_sent: bool) -> dict:
+            if maybe_sent:
+                existing = await self._find_order(payload["receipt"])
+                if existing is not None:
+                    return existing
+            return await self._request("POST", "/orders", json=payload)
+
+        return await self._guarded(attempt)
+
+    async def fetch_order(self, order_id: str) -> dict:
+        return await self._guarded(lambda _: self._request("GET", f"/orders/{order_id}"))
+
+
+razorpay_gateway = RazorpayGateway(RAZORPAY_KEY_ID, RAZORPAY_KEY_SECRET, RAZORPAY_API_BASE_URL)
+
+
+# ── In-process caches ────────────────────────────────────────────────────────
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire `ttl` seconds after being set.
+
+    Not thread-safe; it is only touched from the event loop."""
+
+    _MISSING = object()
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key, default=None):
+        entry = self._data.get(key, self._MISSING)
+        if entry is not self._MISSING:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+        self.misses += 1
+        return default
+
+    def set(self, key, value, ttl: float | None = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+# ── Conditional GET ──────────────────────────────────────────────────────────
+#
+# JSON responses carry a strong ETag (hash of the serialized body) and an
+# If-None-Match hit is answered with an empty 304.
+
+def _etag_for(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """RFC 9110 weak comparison of an If-None-Match header against `etag`.
+
+    Tags of compressed variants (see _encoded_etag) match their base tag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for tag in if_none_match.split(","):
+        tag = tag.strip().removeprefix("W/")
+        if tag == etag or any(tag == _encoded_etag(etag, encoding) for encoding in RESPONSE_ENCODERS):
+            return True
+    return False
+
+
+def _conditional_response(
+    request: Request,
+    body: bytes,
+    etag: str,
+    cache_control: str,
+    encoded: dict[str, bytes] | None = None,
+) -> Response:
+    """Return a 304 if the client already holds `etag`, else the JSON body,
+    using a pre-compressed variant from `encoded` when the client accepts one."""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if encoded:
+        headers["Vary"] = "Accept-Encoding"
+        encoding = _negotiate_encoding(request.headers.get("accept-encoding"))
+        if encoding in encoded:
+            body = encoded[encoding]
+            headers["Content-Encoding"] = encoding
+            headers["ETag"] = _encoded_etag(etag, encoding)
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        headers.pop("Content-Encoding", None)
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _conditional_json(request: Request, payload, cache_control: str = "private, no-cache") -> Response:
+    """Serialize `payload` once, tag it with an ETag, and honour If-None-Match."""
+    body = _json_body(payload)
+    return _conditional_response(request, body, _etag_for(body), cache_control)
+
+
+# ── Response cache ───────────────────────────────────────────────────────────
+#
+# Public catalog endpoints are wrapped with @cached_response. Entries are
+# fresh for the route's TTL, then served stale for RESPONSE_CACHE_STALE_SECONDS
+# while a single background fetch revalidates them. Concurrent misses for the
+# same key share one origin fetch. Entries hold the serialized body, its
+# pre-compressed variants and its ETag, so a hit is answered without
+# re-encoding the payload.
+
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")  # memory | redis | none
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "5000"))
+RESPONSE_CACHE_STALE_SECONDS = float(os.getenv("RESPONSE_CACHE_STALE_SECONDS", "300"))
+RESPONSE_CACHE_REDIS_URL = os.getenv("RESPONSE_CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+RESPONSE_CACHE_TTLS = {
+    route: float(os.getenv(f"RESPONSE_CACHE_TTL_{route.upper()}", default))
+    for route, default in {
+        "places": "60",
+        "search": "30",
+        "featured": "300",
+        "place": "300",
+        "gallery": "600",
+    }.items()
+}
+
+
+class MemoryCacheBackend:
+    """Response cache entries held in a process-local LRU."""
+
+    def __init__(self, maxsize: int):
+        self._cache = TTLCache(maxsize=maxsize, ttl=0)
+
+    async def get(self, key: str):
+        return self._cache.get(key)
+
+    async def set(self, key: str, entry: dict, ttl: float) -> None:
+        self._cache.set(key, entry, ttl=ttl)
+
+    async def aclose(self) -> None:
+        self._cache.clear()
+
+
+class RedisCacheBackend:
+    """Response cache entries held in a Redis-compatible server, shared by
+    all workers. Requires the optional `redis` package."""
+
+    def __init__(self, url: str, prefix: str = "spotnere:response:"):
+        if aioredis is None:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis requires the `redis` package")
+        self._redis = aioredis.from_url(url)
+        self._prefix = prefix
+
+    @staticmethod
+    def _pack(value):
+        if isinstance(value, bytes):
+            return {"__b64__": base64.b64encode(value).decode()}
+        if isinstance(value, dict):
+            return {k: RedisCacheBackend._pack(v) for k, v in value.items()}
+        return value
+
+    @staticmethod
+    def _unpack(value):
+        if isinstance(value, dict):
+            if "__b64__" in value:
+                return base64.b64decode(value["__b64__"])
+            return {k: RedisCacheBackend._unpack(v) for k, v in value.items()}
+        return value
+
+    async def get(self, key: str):
+        raw = await self._redis.get(self._prefix + key)
+        return None if raw is None else self._unpack(orjson.loads(raw))
+
+    async def set(self, key: str, entry: dict, ttl: float) -> None:
+        await self._redis.set(self._prefix + key, orjson.dumps(self._pack(entry)), ex=max(1, math.ceil(ttl)))
+
+    async def aclose(self) -> None:
+        await self._redis.aclose()
+
+
+class ResponseCache:
+    """Stale-while-revalidate cache with single-flight origin fetches."""
+
+    def __init__(self, backend, stale_seconds: float):
+        self.backend = backend
+        self.stale_seconds = stale_seconds
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    async def get_or_fetch(self, key: str, fetch, ttl: float):
+        try:
+            entry = await self.backend.get(key)
+        except Exception as e:
+            logger.warning("Response cache read failed for %s: %s", key, e)
+            entry = None
+
+        if entry is not None:
+            if time.time() < entry["fresh_until"]:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+                if key not in self._inflight:
+                    self._start_fetch(key, fetch, ttl)
+            return entry["value"]
+
+        self.misses += 1
+        task = self._inflight.get(key) or self._start_fetch(key, fetch, ttl)
+        return await asyncio.shield(task)
+
+    def _start_fetch(self, key: str, fetch, ttl: float) -> asyncio.Task:
+        task = asyncio.create_task(self._fetch_and_store(key, fetch, ttl))
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._fetch_done(key, t))
+        return task
+
+    def _fetch_done(self, key: str, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None and not isinstance(error, HTTPException):
+            logger.warning("Response cache fetch failed for %s: %s", key, error)
+
+    async def _fetch_and_store(self, key: str, fetch, ttl: float):
+        value = await fetch()
+        entry = {"fresh_until": time.time() + ttl, "value": value}
+        try:
+            await self.backend.set(key, entry, ttl + self.stale_seconds)
+        except Exception as e:
+            logger.warning("Response cache write failed for %s: %s", key, e)
+        return value
+
+    async def aclose(self) -> None:
+        for task in list(self._inflight.values()):
+            task.cancel()
+        await self.backend.aclose()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "backend": RESPONSE_CACHE_BACKEND,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "inflight": len(self._inflight),
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else None,
+        }
+
+
+def _create_response_cache() -> ResponseCache | None:
+    if RESPONSE_CACHE_BACKEND == "none":
+        return None
+    if RESPONSE_CACHE_BACKEND == "redis":
+        backend = RedisCacheBackend(RESPONSE_CACHE_REDIS_URL)
+    elif RESPONSE_CACHE_BACKEND == "memory":
+        backend = MemoryCacheBackend(RESPONSE_CACHE_MAX_ENTRIES)
+    else:
+        raise ValueError(f"Unsupported RESPONSE_CACHE_BACKEND: {RESPONSE_CACHE_BACKEND}")
+    return ResponseCache(backend, stale_seconds=RESPONSE_CACHE_STALE_SECONDS)
+
+
+response_cache = _create_response_cache()
+
+
+def _normalize_params(params: dict) -> dict:
+    """Strip surrounding whitespace from string query/path params."""
+    return {name: value.strip() if isinstance(value, str) else value for name, value in params.items()}
+
+
+def _response_cache_key(route: str, params: dict) -> str:
+    """Build a cache key from the route name and already normalized params."""
+    normalized = {name: value for name, value in params.items() if value is not None}
+    raw = json.dumps(normalized, sort_keys=True, separators=(",", ":"), default=str)
+    return f"{route}:{hashlib.sha1(raw.encode()).hexdigest()}"
+
+
+def cached_response(route: str):
+    """Serve a public GET handler through the response cache using the
+    TTL configured for `route` in RESPONSE_CACHE_TTLS, with ETag support.
+
+    The wrapped handler gains a `request` parameter; it still receives only
+    its own arguments."""
+    ttl = RESPONSE_CACHE_TTLS[route]
+
+    def decorator(func):
+        async def render(**kwargs) -> dict:
+            body = _json_body(await func(**kwargs))
+            return {"body": body, "etag": _etag_for(body), "encoded": _precompress(body)}
+
+        @functools.wraps(func)
+        async def wrapper(request: Request, **kwargs):
+            # The handler must see exactly the values the cache key was built from.
+            kwargs = _normalize_params(kwargs)
+            if response_cache is None:
+                entry = await render(**kwargs)
+            else:
+                key = _response_cache_key(route, kwargs)
+                entry = await response_cache.get_or_fetch(key, lambda: render(**kwargs), ttl)
+            return _conditional_response(
+                request, entry["body"], entry["etag"], "public, no-cache", entry["encoded"]
+            )
+
+        signature = inspect.signature(func)
+        wrapper.__signature__ = signature.replace(
+            parameters=[
+                *signature.parameters.values(),
+                inspect.Parameter("request", inspect.Parameter.KEYWORD_ONLY, annotation=Request),
+            ]
+        )
+        return wrapper
+
+    return decorator
+
+
+# ── Admission control ────────────────────────────────────────────────────────
+#
+# Every request (except probes and webhooks) is charged against a token
+# bucket keyed by the authenticated user id, or by client IP for anonymous
+# calls. Routes that are expensive upstream draw from their own, smaller
+# budgets, and list endpoints cost one token per RATE_LIMIT_PAGE_SIZE rows
+# requested. Admitted requests then pass a per-worker concurrency limit;
+# callers that cannot get a slot within ADMISSION_QUEUE_TIMEOUT_SECONDS are
+# shed with 503 rather than piling more load onto Supabase.
+#
+# Buckets live in process memory by default. RATE_LIMIT_BACKEND=redis shares
+# them between workers through a Redis-compatible server.
+#
+# Anonymous buckets are only per-client if the server resolves the client IP
+# from X-Forwarded-For, which uvicorn does only for peers listed in
+# SERVER_FORWARDED_ALLOW_IPS (FORWARDED_ALLOW_IPS for the uvicorn CLI).
+# Behind a proxy that is not listed, every anonymous caller shares the
+# proxy's bucket; a warning is logged for each such proxy address.
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")  # memory | redis | none
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+RATE_LIMIT_PAGE_SIZE = int(os.getenv("RATE_LIMIT_PAGE_SIZE", "100"))
+
+# budget -> (tokens refilled per minute, bucket size)
+RATE_LIMIT_BUDGETS = {
+    budget: (
+        float(os.getenv(f"RATE_LIMIT_{budget.upper()}_PER_MINUTE", per_minute)),
+        float(os.getenv(f"RATE_LIMIT_{budget.upper()}_BURST", burst)),
+    )
+    for budget, (per_minute, burst) in {
+        "default": ("300", "60"),
+        "search": ("60", "20"),
+        "login": ("10", "5"),
+        "bookings": ("30", "10"),
+    }.items()
+}
+
+RATE_LIMIT_ROUTE_BUDGETS = {
+    "/api/places/search": "search",
+    "/api/places/nearby": "search",
+    "/api/auth/login": "login",
+    "/api/auth/signup": "login",
+    "/api/bookings": "bookings",
+    "/api/bookings/verify": "bookings",
+}
+
+ADMISSION_EXEMPT_PATHS = {"/health", "/metrics", "/api/webhooks/razorpay"}
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", str(SUPABASE_POOL_MAX_CONNECTIONS)))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "200"))
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "2"))
+ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "1"))
+
+admission_rejections = Metric(
+    "spotnere_admission_rejections_total", "Requests refused by rate limits or load shedding.", "counter",
+    ("reason", "budget"),
+)
+admission_queue_depth = Metric(
+    "spotnere_admission_queue_depth", "Requests waiting for a concurrency slot.", "gauge",
+)
+
+
+class MemoryRateLimitBackend:
+    """Token buckets held in a process-local LRU. A bucket is dropped once it
+    would have refilled completely, which is the same as a fresh one."""
+
+    def __init__(self, maxsize: int):
+        self._buckets = TTLCache(maxsize=maxsize, ttl=0)
+
+    async def take(self, key: str, rate: float, burst: float, cost: float) -> float:
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key) or (burst, now)
+        tokens = min(burst, tokens + (now - updated) * rate)
+        wait = 0.0
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            wait = (cost - tokens) / rate
+        self._buckets.set(key, (tokens, now), ttl=(burst - tokens) / rate + 1)
+        return wait
+
+    async def aclose(self) -> None:
+        self._buckets.clear()
+
+
+class RedisRateLimitBackend:
+    """Token buckets held in a Redis-compatible server, shared by all workers.
+    Requires the optional `redis` package."""
+
+    # Refill and take in one round trip; returns the seconds to wait (0 = admitted).
+    TAKE_SCRIPT = """
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local rate, burst, cost, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= cost then tokens = tokens - cost else wait = (cost - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(((burst - tokens) / rate + 1) * 1000))
+return tostring(wait)
+"""
+
+    def __init__(self, url: str, prefix: str = "spotnere:ratelimit:"):
+        if aioredis is None:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the `redis` package")
+        self._redis = aioredis.from_url(url)
+        self._take = self._redis.register_script(self.TAKE_SCRIPT)
+        self._prefix = prefix
+
+    async def take(self, key: str, rate: float, burst: float, cost: float) -> float:
+        wait = await self._take(keys=[self._prefix + key], args=[rate, burst, cost, time.time()])
+        return float(wait)
+
+    async def aclose(self) -> None:
+        await self._redis.aclose()
+
+
+def _create_rate_limit_backend():
+    if RATE_LIMIT_BACKEND == "none":
+        return None
+    if RATE_LIMIT_BACKEND == "redis":
+        return RedisRateLimitBackend(RATE_LIMIT_REDIS_URL)
+    if RATE_LIMIT_BACKEND == "memory":
+        return MemoryRateLimitBackend(RATE_LIMIT_MAX_KEYS)
+    raise ValueError(f"Unsupported RATE_LIMIT_BACKEND: {RATE_LIMIT_BACKEND}")
+
+
+rate_limit_backend = _create_rate_limit_backend()
+
+
+class ConcurrencyLimiter:
+    """Caps the requests a worker serves at once. Up to `max_queue` more wait
+    for a slot for at most `queue_timeout` seconds; the rest are refused."""
+
+    def __init__(self, limit: int, max_queue: int, queue_timeout: float):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def acquire(self) -> bool:
+        if self._semaphore.locked():
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                return False
+            self.waiting += 1
+            admission_queue_depth.inc()
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                return False
+            finally:
+                self.waiting -= 1
+                admission_queue_depth.dec()
+        else:
+            await self._semaphore.acquire()
+        self.active += 1
+        return True
+
+    def release(self) -> None:
+        self.active -= 1
+        self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+        }
+
+
+concurrency_limiter = (
+    ConcurrencyLimiter(ADMISSION_MAX_CONCURRENCY, ADMISSION_MAX_QUEUE, ADMISSION_QUEUE_TIMEOUT_SECONDS)
+    if ADMISSION_MAX_CONCURRENCY > 0
+    else None
 )
 
-# Configure CORS
+
+def _rate_limit_client(scope) -> str:
+    """`user:<id>` for a valid Bearer token, otherwise `ip:<address>`.
+    Behind a trusted proxy uvicorn has already resolved the client address."""
+    for name, value in scope["headers"]:
+        if name == b"authorization" and value.startswith(b"Bearer "):
+            try:
+                payload = jwt.decode(value[7:].strip().decode("latin-1"), JWT_SECRET, algorithms=[JWT_ALGORITHM])
+            except jwt.InvalidTokenError:
+                break
+            if payload.get("sub"):
+                return f"user:{payload['sub']}"
+            break
+    client = scope.get("client")
+    if client and client[1] != 0 and any(name == b"x-forwarded-for" for name, _ in scope["headers"]):
+        # uvicorn rewrites a trusted peer to (client_ip, 0); a real port means
+        # the forwarding proxy was not trusted and its address is used instead.
+        _warn_untrusted_proxy(client[0])
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+_untrusted_proxies: set[str] = set()
+
+
+def _warn_untrusted_proxy(host: str) -> None:
+    if host in _untrusted_proxies or len(_untrusted_proxies) >= 64:
+        return
+    _untrusted_proxies.add(host)
+    logger.warning(
+        "Request from %s carries X-Forwarded-For but %s is not a trusted proxy; anonymous "
+        "rate limits will share one bucket per proxy. Add it to SERVER_FORWARDED_ALLOW_IPS.",
+        host, host,
+    )
+
+
+def _rate_limit_cost(scope) -> int:
+    """One token, or one per RATE_LIMIT_PAGE_SIZE rows for `?limit=` requests."""
+    for name, value in parse_qsl(scope.get("query_string", b"").decode("latin-1")):
+        if name == "limit" and value.isdigit():
+            return max(1, math.ceil(int(value) / RATE_LIMIT_PAGE_SIZE))
+    return 1
+
+
+async def _rate_limit_wait(scope, budget: str) -> float:
+    """Seconds until the client may retry, or 0 if the request is admitted."""
+    if rate_limit_backend is None:
+        return 0.0
+    per_minute, burst = RATE_LIMIT_BUDGETS[budget]
+    key = f"{budget}:{_rate_limit_client(scope)}"
+    try:
+        return await rate_limit_backend.take(key, per_minute / 60, burst, min(_rate_limit_cost(scope), burst))
+    except Exception as e:
+        # Fail open: an unavailable limiter store must not take the API down.
+        logger.warning("Rate limit check failed for %s: %s", key, e)
+        return 0.0
+
+
+async def _send_rejection(send, status: int, detail: str, retry_after: float) -> None:
+    body = orjson.dumps({"detail": detail})
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying the rate limits and the concurrency limit."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in ADMISSION_EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        budget = RATE_LIMIT_ROUTE_BUDGETS.get(_route_template(scope), "default")
+        retry_after = await _rate_limit_wait(scope, budget)
+        if retry_after > 0:
+            admission_rejections.inc(("rate_limit", budget))
+            await _send_rejection(send, 429, "Too many requests", retry_after)
+            return
+
+        if concurrency_limiter is None:
+            await self.app(scope, receive, send)
+            return
+        if not await concurrency_limiter.acquire():
+            admission_rejections.inc(("overloaded", budget))
+            await _send_rejection(send, 503, "Server is busy, please retry shortly", ADMISSION_RETRY_AFTER_SECONDS)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            concurrency_limiter.release()
+
+
+def _admission_stats() -> dict:
+    return {
+        "rate_limit_backend": RATE_LIMIT_BACKEND,
+        "concurrency": concurrency_limiter.stats() if concurrency_limiter is not None else None,
+    }
+
+
+# ── Middleware ───────────────────────────────────────────────────────────────
+#
+# Each add_middleware call wraps the stack registered so far, so the first one
+# is innermost. Admission control sits inside CORS, so rejections still carry
+# CORS headers. Compression sits outside CORS, and metrics is outermost, so
+# every response (rejections included) is counted.
+
+app.add_middleware(AdmissionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -35,27 +1386,172 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
+
+
+# ── Background artifacts ─────────────────────────────────────────────────────
+#
+# Expensive documents (the sitemap, pre-rendered pages) are rebuilt on a
+# schedule by tasks started in the lifespan handler. Requests read the last
+# good build; a failed build keeps the previous one and records the error.
+
+class BackgroundArtifact:
+    """A value rebuilt every `interval` seconds by `build(previous)`.
+
+    Refreshes are single-flight: a caller arriving while a build is running
+    waits for it instead of starting another. `discard(value)` is called for
+    the final value on shutdown."""
+
+    def __init__(self, name: str, build, interval: float, discard=None):
+        self.name = name
+        self.interval = interval
+        self.value = None
+        self.built_at: datetime | None = None
+        self.last_error: str | None = None
+        self._build = build
+        self._discard = discard
+        self._lock = asyncio.Lock()
+
+    async def refresh(self) -> None:
+        if self._lock.locked():
+            async with self._lock:
+                return
+        async with self._lock:
+            started = time.monotonic()
+            try:
+                self.value = await self._build(self.value)
+            except Exception as e:
+                self.last_error = str(e)
+                logger.warning("Rebuilding %s failed: %s", self.name, e)
+                return
+            self.built_at = datetime.now(timezone.utc)
+            self.last_error = None
+            logger.info("Rebuilt %s in %.2fs", self.name, time.monotonic() - started)
+
+    async def run(self, initial_delay: float = 0) -> None:
+        """Background loop started from the app lifespan."""
+        await asyncio.sleep(initial_delay)
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.interval)
+
+    def close(self) -> None:
+        if self.value is not None and self._discard is not None:
+            self._discard(self.value)
+        self.value = None
+
+    def age_seconds(self) -> float | None:
+        if self.built_at is None:
+            return None
+        return (datetime.now(timezone.utc) - self.built_at).total_seconds()
+
+    def stats(self) -> dict:
+        age = self.age_seconds()
+        return {
+            "built_at": self.built_at.isoformat() if self.built_at else None,
+            "age_seconds": round(age, 1) if age is not None else None,
+            "refreshing": self._lock.locked(),
+            "last_error": self.last_error,
+        }
 
-# Supabase connection
-def get_supabase_client() -> Client:
-    """Create and return a Supabase client instance"""
-    supabase_url = os.getenv("SUPABASE_URL")
-    supabase_key = os.getenv("SUPABASE_KEY")
-    
-    if not supabase_url:
-        raise ValueError("SUPABASE_URL environment variable is not set")
-    if not supabase_key:
-        raise ValueError("SUPABASE_KEY environment variable is not set")
-    
-    return create_client(supabase_url, supabase_key)
 
-# Initialize Supabase client
-supabase: Client = get_supabase_client()
+# ── Background work queue ────────────────────────────────────────────────────
+#
+# In-process queue for work acknowledged in a request but done afterwards.
+# A fixed number of workers bounds concurrency; failed items are requeued
+# with exponential backoff until `max_attempts` is reached.
 
-# Initialize Razorpay client
-RAZORPAY_KEY_ID = os.getenv("RAZORPAY_KEY_ID", "")
-RAZORPAY_KEY_SECRET = os.getenv("RAZORPAY_KEY_SECRET", "")
-razorpay_client = razorpay.Client(auth=(RAZORPAY_KEY_ID, RAZORPAY_KEY_SECRET))
+class WorkQueue:
+    """Bounded asyncio queue drained by `concurrency` workers calling `handler(item)`."""
+
+    def __init__(
+        self,
+        name: str,
+        handler,
+        concurrency: int,
+        maxsize: int,
+        max_attempts: int,
+        retry_backoff: float,
+    ):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self._handler = handler
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._retry_handles: set[asyncio.TimerHandle] = set()
+        self.in_flight = 0
+        self.processed = 0
+        self.retried = 0
+        self.failed = 0
+
+    def put_nowait(self, item) -> bool:
+        """Enqueue `item`; returns False when the queue is full."""
+        try:
+            self._queue.put_nowait((item, 1))
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    def _requeue(self, item, attempt: int, handle_ref: list) -> None:
+        self._retry_handles.discard(handle_ref[0])
+        try:
+            self._queue.put_nowait((item, attempt))
+        except asyncio.QueueFull:
+            self.failed += 1
+            logger.error("%s queue full, dropping retry of %r", self.name, item)
+
+    async def _worker(self) -> None:
+        while True:
+            item, attempt = await self._queue.get()
+            self.in_flight += 1
+            try:
+                await self._handler(item)
+                self.processed += 1
+            except Exception as e:
+                if attempt >= self.max_attempts:
+                    self.failed += 1
+                    logger.error("%s item failed after %d attempts: %s", self.name, attempt, e)
+                else:
+                    self.retried += 1
+                    delay = self.retry_backoff * 2 ** (attempt - 1)
+                    logger.warning("%s item failed (attempt %d), retrying in %.1fs: %s", self.name, attempt, delay, e)
+                    handle_ref: list = []
+                    handle = asyncio.get_running_loop().call_later(
+                        delay, self._requeue, item, attempt + 1, handle_ref
+                    )
+                    handle_ref.append(handle)
+                    self._retry_handles.add(handle)
+            finally:
+                self.in_flight -= 1
+                self._queue.task_done()
+
+    async def run(self) -> None:
+        """Background loop started from the app lifespan."""
+        try:
+            await asyncio.gather(*(self._worker() for _ in range(self.concurrency)))
+        finally:
+            for handle in self._retry_handles:
+                handle.cancel()
+            self._retry_handles.clear()
+
+    async def drain(self, timeout: float) -> None:
+        """Wait up to `timeout` seconds for queued items to finish."""
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("%s queue not drained, %d items left", self.name, self._queue.qsize())
+
+    def stats(self) -> dict:
+        return {
+            "pending": self._queue.qsize(),
+            "scheduled_retries": len(self._retry_handles),
+            "in_flight": self.in_flight,
+            "processed": self.processed,
+            "retried": self.retried,
+            "failed": self.failed,
+        }
 
 
 # ── Auth config ───────────────────────────────────────────────────────────────
@@ -65,26 +1561,122 @@ JWT_ALGORITHM = "HS256"
 JWT_EXPIRY_HOURS = 24 * 7  # 7 days
 
 
-def _hash_password(plain: str) -> str:
-    """Hash using 16-byte random salt + 10 000 iterations of SHA-256.
-    Stored as  salt_hex:hash_hex  (same scheme used by the Node.js app)."""
-    salt = os.urandom(16).hex()
+# Password hashes are stored in one of three formats:
+#   scrypt$<n>$<r>$<p>$<salt_hex>$<hash_hex>            (current default)
+#   pbkdf2_sha256$<iterations>$<salt_hex>$<hash_hex>
+#   <salt_hex>:<hash_hex>                               (legacy, Node.js app)
+# plus plain text for rows that predate hashing. Anything that is not in the
+# configured scheme is transparently re-hashed on the next successful login.
+#
+# Defaults target roughly 50-100 ms of CPU per hash on one core: scrypt with
+# n=2**14, r=8 (16 MiB per hash) is memory-hard at ~60 ms, whereas PBKDF2 at
+# OWASP's 600k iterations costs ~300 ms and would cap a worker at a few logins
+# per second. Raise the cost only together with PASSWORD_HASH_WORKERS.
+
+PASSWORD_HASH_SCHEME = os.getenv("PASSWORD_HASH_SCHEME", "scrypt")
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv("PASSWORD_PBKDF2_ITERATIONS", "200000"))
+PASSWORD_SCRYPT_N = int(os.getenv("PASSWORD_SCRYPT_N", str(2**14)))
+PASSWORD_SCRYPT_R = int(os.getenv("PASSWORD_SCRYPT_R", "8"))
+PASSWORD_SCRYPT_P = int(os.getenv("PASSWORD_SCRYPT_P", "1"))
+LEGACY_SHA256_ITERATIONS = 10_000
+
+if PASSWORD_HASH_SCHEME not in ("pbkdf2_sha256", "scrypt"):
+    raise ValueError(f"Unsupported PASSWORD_HASH_SCHEME: {PASSWORD_HASH_SCHEME}")
+
+
+def _legacy_sha256(plain: str, salt: str) -> str:
     current = plain + salt
-    for _ in range(10_000):
+    for _ in range(LEGACY_SHA256_ITERATIONS):
         current = hashlib.sha256(current.encode()).hexdigest()
-    return f"{salt}:{current}"
+    return current
+
+
+def _hash_password(plain: str) -> str:
+    """Hash with the configured C-backed KDF and a 16-byte random salt."""
+    salt = os.urandom(16)
+    if PASSWORD_HASH_SCHEME == "scrypt":
+        digest = hashlib.scrypt(
+            plain.encode(),
+            salt=salt,
+            n=PASSWORD_SCRYPT_N,
+            r=PASSWORD_SCRYPT_R,
+            p=PASSWORD_SCRYPT_P,
+        )
+        return (
+            f"scrypt${PASSWORD_SCRYPT_N}${PASSWORD_SCRYPT_R}${PASSWORD_SCRYPT_P}"
+            f"${salt.hex()}${digest.hex()}"
+        )
+    digest = hashlib.pbkdf2_hmac("sha256", plain.encode(), salt, PASSWORD_PBKDF2_ITERATIONS)
+    return f"pbkdf2_sha256${PASSWORD_PBKDF2_ITERATIONS}${salt.hex()}${digest.hex()}"
 
 
 def _verify_password(plain: str, stored: str) -> bool:
-    """Verify against the salt:hash format. Falls back to plain-text
+    """Verify against any supported hash format. Falls back to plain-text
     comparison for any legacy rows that predate hashing."""
+    try:
+        if stored.startswith("pbkdf2_sha256$"):
+            _, iterations, salt, stored_hash = stored.split("$")
+            digest = hashlib.pbkdf2_hmac(
+                "sha256", plain.encode(), bytes.fromhex(salt), int(iterations)
+            )
+            return hmac.compare_digest(digest.hex(), stored_hash)
+        if stored.startswith("scrypt$"):
+            _, n, r, p, salt, stored_hash = stored.split("$")
+            digest = hashlib.scrypt(
+                plain.encode(), salt=bytes.fromhex(salt), n=int(n), r=int(r), p=int(p)
+            )
+            return hmac.compare_digest(digest.hex(), stored_hash)
+    except ValueError:
+        return False
     if ":" not in stored:
-        return plain == stored
+        return hmac.compare_digest(plain.encode(), stored.encode())
     salt, stored_hash = stored.split(":", 1)
-    current = plain + salt
-    for _ in range(10_000):
-        current = hashlib.sha256(current.encode()).hexdigest()
-    return current == stored_hash
+    return hmac.compare_digest(_legacy_sha256(plain, salt), stored_hash)
+
+
+def _password_needs_rehash(stored: str) -> bool:
+    """True when `stored` is not in the configured scheme with current parameters."""
+    if PASSWORD_HASH_SCHEME == "scrypt":
+        prefix = f"scrypt${PASSWORD_SCRYPT_N}${PASSWORD_SCRYPT_R}${PASSWORD_SCRYPT_P}$"
+    else:
+        prefix = f"pbkdf2_sha256${PASSWORD_PBKDF2_ITERATIONS}$"
+    return not stored.startswith(prefix)
+
+
+# ── Password hashing pool ────────────────────────────────────────────────────
+#
+# Hashing is CPU-bound, so it runs on a bounded thread pool (pbkdf2_hmac and
+# scrypt release the GIL). Once PASSWORD_HASH_MAX_PENDING jobs are queued or
+# running, further requests are shed with a 503 instead of piling up.
+
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+
+# Created in the lifespan, since shutdown cancels its queued jobs.
+_password_executor: ThreadPoolExecutor | None = None
+_password_jobs_pending = 0
+
+
+def _create_password_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
+
+async def _run_password_job(func, *args):
+    """Run a hashing function on the password pool, or raise 503 when saturated."""
+    global _password_jobs_pending
+
+    if _password_jobs_pending >= PASSWORD_HASH_MAX_PENDING:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy, please try again shortly",
+            headers={"Retry-After": "1"},
+        )
+    _password_jobs_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_password_executor, func, *args)
+    finally:
+        _password_jobs_pending -= 1
 
 
 def _create_token(user_id: str) -> str:
@@ -134,8 +1726,17 @@ class SignupRequest(BaseModel):
 
 # ── JWT verification dependency ──────────────────────────────────────────────
 
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+
+# Authenticated user rows keyed by user id. Entries must be dropped with
+# _user_cache.pop(user_id) whenever the users row is written.
+_user_cache = TTLCache(maxsize=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+
+
 async def get_current_user(authorization: str = Header(None)):
-    """Decode the Bearer JWT and fetch the user row from the users table."""
+    """Decode the Bearer JWT and fetch the user row from the users table
+    (served from the in-process user cache when fresh)."""
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Missing or invalid authorization header")
 
@@ -150,8 +1751,12 @@ async def get_current_user(authorization: str = Header(None)):
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+    cached = _user_cache.get(user_id)
+    if cached is not None:
+        return cached
+
     try:
-        response = (
+        response = await (
             supabase.table("users")
             .select("*")
             .eq("id", user_id)
@@ -160,6 +1765,7 @@ async def get_current_user(authorization: str = Header(None)):
         )
         if not response.data:
             raise HTTPException(status_code=401, detail="User not found")
+        _user_cache.set(user_id, response.data)
         return response.data
     except HTTPException:
         raise
@@ -173,7 +1779,7 @@ async def get_current_user(authorization: str = Header(None)):
 async def auth_signup(body: SignupRequest):
     """Register a new user in the users table."""
     try:
-        existing = (
+        existing = await (
             supabase.table("users")
             .select("id")
             .eq("email", body.email)
@@ -182,7 +1788,7 @@ async def auth_signup(body: SignupRequest):
         if existing.data:
             raise HTTPException(status_code=409, detail="A user with this email already exists")
 
-        hashed = _hash_password(body.password)
+        hashed = await _run_password_job(_hash_password, body.password)
 
         insert_data = {
             "first_name": body.first_name,
@@ -197,7 +1803,7 @@ async def auth_signup(body: SignupRequest):
             "postal_code": body.postal_code,
         }
 
-        response = (
+        response = await (
             supabase.table("users")
             .insert(insert_data)
             .execute()
@@ -227,7 +1833,7 @@ async def auth_signup(body: SignupRequest):
 async def auth_login(body: LoginRequest):
     """Authenticate against the users table and return a JWT."""
     try:
-        response = (
+        response = await (
             supabase.table("users")
             .select("*")
             .eq("email", body.email)
@@ -239,14 +1845,18 @@ async def auth_login(body: LoginRequest):
 
         user_row = response.data[0]
 
-        if not _verify_password(body.password, user_row["password_hash"]):
+        if not await _run_password_job(
+            _verify_password, body.password, user_row["password_hash"]
+        ):
             raise HTTPException(status_code=401, detail="Invalid email or password")
 
-        # Auto-upgrade plain-text passwords to salted SHA-256
-        if ":" not in user_row["password_hash"]:
-            supabase.table("users").update(
-                {"password_hash": _hash_password(body.password)}
+        # Auto-upgrade plain-text and legacy salt:hash passwords to the current KDF
+        if _password_needs_rehash(user_row["password_hash"]):
+            new_hash = await _run_password_job(_hash_password, body.password)
+            await supabase.table("users").update(
+                {"password_hash": new_hash}
             ).eq("id", user_row["id"]).execute()
+            _user_cache.pop(user_row["id"])
 
         token = _create_token(user_row["id"])
 
@@ -295,12 +1905,13 @@ async def update_profile(body: UpdateProfileRequest, user=Depends(get_current_us
         if not updates:
             raise HTTPException(status_code=400, detail="No fields to update")
 
-        response = (
+        response = await (
             supabase.table("users")
             .update(updates)
             .eq("id", user["id"])
             .execute()
         )
+        _user_cache.pop(user["id"])
 
         if not response.data:
             raise HTTPException(status_code=404, detail="User not found")
@@ -321,80 +1932,168 @@ class FavoriteToggleRequest(BaseModel):
     place_id: str
 
 
+FAVORITES_CACHE_TTL_SECONDS = float(os.getenv("FAVORITES_CACHE_TTL_SECONDS", "300"))
+FAVORITES_CACHE_MAX_SIZE = int(os.getenv("FAVORITES_CACHE_MAX_SIZE", "10000"))
+
+# Favorite place ids keyed by user id. Entries must be dropped with
+# _favorites_cache.pop(user_id) whenever the user's user_places rows change.
+_favorites_cache = TTLCache(maxsize=FAVORITES_CACHE_MAX_SIZE, ttl=FAVORITES_CACHE_TTL_SECONDS)
+
+
+async def _favorite_ids(user_id: str) -> list[str]:
+    """Favorite place ids for a user, served from the favorites cache when fresh."""
+    cached = _favorites_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    response = await (
+        supabase.table("user_places")
+        .select("fav_place_id")
+        .eq("user_id", user_id)
+        .order("id")
+        .execute()
+    )
+    place_ids = [row["fav_place_id"] for row in (response.data or [])]
+    _favorites_cache.set(user_id, place_ids)
+    return place_ids
+
+
 @app.get("/api/favorites")
-async def get_favorites(user=Depends(get_current_user)):
+async def get_favorites(request: Request, user=Depends(get_current_user)):
     """Return all favorite place IDs for the logged-in user."""
     try:
-        response = (
-            supabase.table("user_places")
-            .select("fav_place_id")
-            .eq("user_id", user["id"])
-            .execute()
-        )
-        place_ids = [row["fav_place_id"] for row in (response.data or [])]
-        return {"success": True, "data": place_ids}
+        place_ids = await _favorite_ids(user["id"])
+        return _conditional_json(request, {"success": True, "data": place_ids})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching favorites: {str(e)}")
 
 
 @app.get("/api/favorites/places")
-async def get_favorite_places(user=Depends(get_current_user)):
-    """Return the full place objects for the logged-in user's favorites."""
-    try:
-        fav_response = (
-            supabase.table("user_places")
-            .select("fav_place_id")
-            .eq("user_id", user["id"])
-            .execute()
-        )
-        place_ids = [row["fav_place_id"] for row in (fav_response.data or [])]
-
-        if not place_ids:
-            return {"success": True, "data": [], "count": 0}
+async def get_favorite_places(
+    limit: int | None = Query(None, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    view: Literal["card", "detail"] | None = None,
+    fields: str | None = None,
+    user=Depends(get_current_user),
+):
+    """Return the place objects for the logged-in user's favorites
+    (optionally projected with `view` or `fields`). Without `limit` the full
+    list is returned; with it, one page plus `has_more`/`next_offset`.
 
-        places_response = (
-            supabase.table("places")
-            .select("*")
-            .in_("id", place_ids)
-            .eq("visible", True)
-            .execute()
-        )
+    Served from the place catalog when it is loaded; otherwise the favorites
+    and their places are fetched in one embedded-resource query.
+    """
+    columns = _place_projection(view, fields)
 
+    try:
+        if place_catalog.ready:
+            place_ids = await _favorite_ids(user["id"])
+            rows = [place_catalog.rows[pid] for pid in place_ids if pid in place_catalog.rows]
+            page = rows[offset:] if limit is None else rows[offset:offset + limit + 1]
+        else:
+            query = (
+                supabase.table("user_places")
+                .select(f"fav_place_id, places!inner({_select_columns(columns)})")
+                .eq("user_id", user["id"])
+                .eq("places.visible", True)
+                .order("id")
+            )
+            if limit is not None:
+                query = query.range(offset, offset + limit)
+            elif offset:
+                query = query.offset(offset)
+            response = await query.execute()
+            page = [row["places"] for row in (response.data or []) if row.get("places")]
+
+        has_more = limit is not None and len(page) > limit
+        data = [_project_row(row, columns) for row in page[:limit]]
         return {
             "success": True,
-            "data": places_response.data or [],
-            "count": len(places_response.data or []),
+            "data": data,
+            "count": len(data),
+            "has_more": has_more,
+            "next_offset": offset + limit if has_more else None,
         }
     except Exception as e:
+        _raise_for_projection_error(e, columns)
         raise HTTPException(status_code=500, detail=f"Error fetching favorite places: {str(e)}")
 
 
 @app.post("/api/favorites/toggle")
 async def toggle_favorite(body: FavoriteToggleRequest, user=Depends(get_current_user)):
-    """Add or remove a place from the user's favorites. Returns the new state."""
-    try:
-        existing = (
-            supabase.table("user_places")
-            .select("id")
-            .eq("user_id", user["id"])
-            .eq("fav_place_id", body.place_id)
-            .execute()
-        )
+    """Add or remove a place from the user's favorites. Returns the new state.
 
-        if existing.data:
-            supabase.table("user_places").delete().eq("user_id", user["id"]).eq("fav_place_id", body.place_id).execute()
-            return {"success": True, "favorited": False}
-        else:
-            supabase.table("user_places").insert({
-                "user_id": user["id"],
-                "fav_place_id": body.place_id,
-            }).execute()
-            return {"success": True, "favorited": True}
+    Runs as the `toggle_favorite` database function (sql/favorites.sql), so
+    the check and the write happen in one atomic round trip.
+    """
+    try:
+        response = await supabase.rpc(
+            "toggle_favorite",
+            {"p_user_id": user["id"], "p_place_id": body.place_id},
+        ).execute()
+        _favorites_cache.pop(user["id"])
+        return {"success": True, "favorited": bool(response.data)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error toggling favorite: {str(e)}")
 
 
+FAVORITES_SYNC_MAX_OPS = int(os.getenv("FAVORITES_SYNC_MAX_OPS", "500"))
+
+
+class FavoriteSyncOperation(BaseModel):
+    place_id: str
+    op: Literal["add", "remove"]
+
+
+class FavoriteSyncRequest(BaseModel):
+    operations: list[FavoriteSyncOperation] = Field(..., max_length=FAVORITES_SYNC_MAX_OPS)
+
+
+@app.post("/api/favorites/sync")
+async def sync_favorites(body: FavoriteSyncRequest, user=Depends(get_current_user)):
+    """
+    Apply a batch of queued add/remove operations (e.g. from an offline
+    client) in one call. Operations are applied in order, so the last one
+    for a place wins. Returns the user's resulting favorite place IDs.
+    """
+    final_state: dict[str, bool] = {}
+    for operation in body.operations:
+        final_state[operation.place_id] = operation.op == "add"
+
+    try:
+        response = await supabase.rpc(
+            "sync_favorites",
+            {
+                "p_user_id": user["id"],
+                "p_add": [pid for pid, favorited in final_state.items() if favorited],
+                "p_remove": [pid for pid, favorited in final_state.items() if not favorited],
+            },
+        ).execute()
+        place_ids = [row["fav_place_id"] for row in (response.data or [])]
+        _favorites_cache.set(user["id"], place_ids)
+        return {"success": True, "data": place_ids}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error syncing favorites: {str(e)}")
+
+
 # ── Bookings endpoints ────────────────────────────────────────────────────────
+#
+# create_booking remembers the server-side order details (amount, place,
+# guests, slot) per Razorpay order id, so verification checks the client's
+# claims without another place lookup. Verification is keyed on the order
+# id: bookings.razorpay_order_id is unique (sql/bookings.sql), the insert is
+# an upsert that ignores duplicates, and confirmed bookings are cached so a
+# retried verify returns the existing row without touching the database.
+
+BOOKING_ORDER_CACHE_TTL_SECONDS = float(os.getenv("BOOKING_ORDER_CACHE_TTL_SECONDS", "3600"))
+BOOKING_CACHE_TTL_SECONDS = float(os.getenv("BOOKING_CACHE_TTL_SECONDS", "3600"))
+BOOKING_CACHE_MAX_SIZE = int(os.getenv("BOOKING_CACHE_MAX_SIZE", "10000"))
+
+# Order details keyed by Razorpay order id (see _booking_order_details).
+_booking_orders = TTLCache(maxsize=BOOKING_CACHE_MAX_SIZE, ttl=BOOKING_ORDER_CACHE_TTL_SECONDS)
+# Confirmed bookings rows keyed by Razorpay order id.
+_confirmed_bookings = TTLCache(maxsize=BOOKING_CACHE_MAX_SIZE, ttl=BOOKING_CACHE_TTL_SECONDS)
+
 
 class CreateBookingRequest(BaseModel):
     place_id: str
@@ -402,13 +2101,84 @@ class CreateBookingRequest(BaseModel):
     number_of_guests: int = 1
 
 
+def _booking_order_details(order: dict) -> dict:
+    """The booking fields carried by a Razorpay order we created."""
+    notes = order.get("notes") or {}
+    return {
+        "user_id": notes.get("user_id"),
+        "place_id": notes.get("place_id"),
+        "booking_date_time": notes.get("booking_date_time"),
+        "number_of_guests": int(notes.get("guests") or 1),
+        "booking_ref": order.get("receipt"),
+        "amount_paise": int(order["amount"]),
+    }
+
+
+async def _get_booking_order(order_id: str) -> dict:
+    """Order details from the local cache, or from Razorpay on a miss
+    (e.g. the order was created by another worker)."""
+    details = _booking_orders.get(order_id)
+    if details is None:
+        details = _booking_order_details(await razorpay_gateway.fetch_order(order_id))
+        _booking_orders.set(order_id, details)
+    return details
+
+
+async def _confirm_booking(order_id: str, payment_id: str, signature: str | None, details: dict) -> dict:
+    """Insert the bookings row for a paid order, or return the existing one."""
+    cached = _confirmed_bookings.get(order_id)
+    if cached is not None:
+        return cached
+
+    row = {
+        "user_id": details["user_id"],
+        "place_id": details["place_id"],
+        "booking_date_time": details["booking_date_time"],
+        "booking_ref_number": details["booking_ref"],
+        "amount_paid": details["amount_paise"] / 100,
+        "currency_paid": "INR",
+        "razorpay_order_id": order_id,
+        "razorpay_payment_id": payment_id,
+        "razorpay_signature": signature,
+        "transaction_id": payment_id,
+        "payment_status": "SUCCESS",
+        "payment_method": "razorpay",
+        "paid_at": datetime.now(timezone.utc).isoformat(),
+        "booking_status": "CONFIRMED",
+        "number_of_guests": details["number_of_guests"],
+    }
+    response = await (
+        supabase.table("bookings")
+        .upsert(row, on_conflict="razorpay_order_id", ignore_duplicates=True)
+        .execute()
+    )
+    if response.data:
+        booking = response.data[0]
+    else:
+        # Already recorded by an earlier or concurrent call
+        existing = await (
+            supabase.table("bookings")
+            .select("*")
+            .eq("razorpay_order_id", order_id)
+            .maybe_single()
+            .execute()
+        )
+        if existing is None or not existing.data:
+            raise HTTPException(status_code=500, detail="Failed to create booking")
+        booking = existing.data
+
+    _confirmed_bookings.set(order_id, booking)
+    _booking_orders.pop(order_id)
+    return booking
+
+
 @app.post("/api/bookings")
 async def create_booking(body: CreateBookingRequest, user=Depends(get_current_user)):
     """Create a Razorpay order for the booking. No DB row yet — that happens after payment."""
     import uuid
 
     try:
-        place_resp = (
+        place_resp = await (
             supabase.table("places")
             .select("id, avg_price, name")
             .eq("id", body.place_id)
@@ -420,11 +2190,11 @@ async def create_booking(body: CreateBookingRequest, user=Depends(get_current_us
 
         avg_price = float(place_resp.data.get("avg_price") or 0)
         amount = round(avg_price * body.number_of_guests, 2)
-        amount_paise = int(amount * 100)
+        amount_paise = round(amount * 100)
 
         booking_ref = f"SPT-{uuid.uuid4().hex[:8].upper()}"
 
-        razorpay_order = razorpay_client.order.create({
+        razorpay_order = await razorpay_gateway.create_order({
             "amount": amount_paise,
             "currency": "INR",
             "receipt": booking_ref,
@@ -432,8 +2202,10 @@ async def create_booking(body: CreateBookingRequest, user=Depends(get_current_us
                 "place_id": body.place_id,
                 "user_id": user["id"],
                 "guests": body.number_of_guests,
+                "booking_date_time": body.booking_date_time,
             },
         })
+        _booking_orders.set(razorpay_order["id"], _booking_order_details(razorpay_order))
 
         return {
             "success": True,
@@ -445,7 +2217,15 @@ async def create_booking(body: CreateBookingRequest, user=Depends(get_current_us
         }
     except HTTPException:
         raise
-    except Exception as e:
+    except CircuitOpenError as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Payment gateway is temporarily unavailable, please try again shortly",
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
+    except RazorpayError as e:
+        raise HTTPException(status_code=502, detail=f"Payment gateway error: {str(e)}")
+    except Exception as e:
         raise HTTPException(status_code=500, detail=f"Booking failed: {str(e)}")
 
 
@@ -454,7 +2234,7 @@ class VerifyPaymentRequest(BaseModel):
     booking_date_time: str
     number_of_guests: int
     booking_ref: str
-    amount_paid: float
+    amount_paid: float  # informational; the order's own amount is what gets recorded
     razorpay_order_id: str
     razorpay_payment_id: str
     razorpay_signature: str
@@ -462,7 +2242,11 @@ class VerifyPaymentRequest(BaseModel):
 
 @app.post("/api/bookings/verify")
 async def verify_booking_payment(body: VerifyPaymentRequest, user=Depends(get_current_user)):
-    """Verify Razorpay signature, then insert the booking row on success."""
+    """Verify Razorpay signature, then record the booking on success.
+
+    Safe to retry: repeated calls for the same order return the same booking.
+    The client's place, ref and guest count must match the order created
+    server-side; the amount recorded is the order's, not the client's."""
     try:
         generated_signature = hmac.new(
             RAZORPAY_KEY_SECRET.encode("utf-8"),
@@ -473,60 +2257,208 @@ async def verify_booking_payment(body: VerifyPaymentRequest, user=Depends(get_cu
         if not hmac.compare_digest(generated_signature, body.razorpay_signature):
             raise HTTPException(status_code=400, detail="Invalid payment signature")
 
-        row = {
-            "user_id": user["id"],
-            "place_id": body.place_id,
-            "booking_date_time": body.booking_date_time,
-            "booking_ref_number": body.booking_ref,
-            "amount_paid": body.amount_paid,
-            "currency_paid": "INR",
-            "razorpay_order_id": body.razorpay_order_id,
-            "razorpay_payment_id": body.razorpay_payment_id,
-            "razorpay_signature": body.razorpay_signature,
-            "transaction_id": body.razorpay_payment_id,
-            "payment_status": "SUCCESS",
-            "payment_method": "razorpay",
-            "paid_at": datetime.now(timezone.utc).isoformat(),
-            "booking_status": "CONFIRMED",
-            "number_of_guests": body.number_of_guests,
-        }
-
-        response = supabase.table("bookings").insert(row).execute()
-
-        if not response.data:
-            raise HTTPException(status_code=500, detail="Failed to create booking")
-
-        return {"success": True, "data": response.data[0]}
+        cached = _confirmed_bookings.get(body.razorpay_order_id)
+        if cached is not None:
+            if cached["user_id"] != user["id"]:
+                raise HTTPException(status_code=403, detail="Order belongs to another user")
+            return {"success": True, "data": cached}
+
+        try:
+            details = await _get_booking_order(body.razorpay_order_id)
+        except RazorpayError as e:
+            if e.status_code in (400, 404):
+                raise HTTPException(status_code=404, detail="Unknown order")
+            raise
+
+        if details["user_id"] != user["id"]:
+            raise HTTPException(status_code=403, detail="Order belongs to another user")
+        if (
+            details["place_id"] != body.place_id
+            or details["booking_ref"] != body.booking_ref
+            or details["number_of_guests"] != body.number_of_guests
+        ):
+            raise HTTPException(status_code=400, detail="Booking details do not match the order")
+        if details["booking_date_time"] is None:
+            # Orders created before the slot was stored in the notes
+            details = {**details, "booking_date_time": body.booking_date_time}
+
+        booking = await _confirm_booking(
+            body.razorpay_order_id, body.razorpay_payment_id, body.razorpay_signature, details
+        )
+        return {"success": True, "data": booking}
     except HTTPException:
         raise
+    except CircuitOpenError as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Payment gateway is temporarily unavailable, please try again shortly",
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Payment verification failed: {str(e)}")
 
 
+# Columns per bookings view. The embedded place is aliased to `place` in the
+# select itself so rows come back in the response shape.
+BOOKING_VIEWS = {
+    "list": (
+        "id, booking_ref_number, booking_date_time, booking_status, payment_status, "
+        "number_of_guests, amount_paid, currency_paid, "
+        "place:places(id, name, banner_image_link, city)"
+    ),
+    "detail": "*, place:places(id, name, banner_image_link, city, country)",
+}
+
+
+BOOKINGS_PAGE_SIZE = 20
+
+
 @app.get("/api/bookings")
-async def get_bookings(user=Depends(get_current_user)):
-    """Return all bookings for the logged-in user, with place details joined."""
+async def get_bookings(
+    request: Request,
+    limit: int | None = Query(None, ge=1, le=100),
+    cursor: str | None = None,
+    when: Literal["all", "upcoming", "past"] = "all",
+    status: str | None = None,
+    view: Literal["list", "detail"] = "detail",
+    user=Depends(get_current_user),
+):
+    """
+    Return the logged-in user's bookings, with place details joined.
+
+    - when: `upcoming` (soonest first) or `past`/`all` (most recent first)
+    - status: booking_status, comma-separated for several
+    - view: `list` for a slim card payload, `detail` for full rows
+
+    Without `limit` or `cursor` every matching booking is returned. Passing
+    either switches to pages of `limit` (default 20) keyed on
+    (booking_date_time, id); pass `next_cursor` back as `cursor` with the
+    same `when` to get the following page.
+    """
+    sort = "booking_date_time"
+    desc = when != "upcoming"
+    if limit is None and cursor:
+        limit = BOOKINGS_PAGE_SIZE
+
     try:
-        response = (
+        query = (
             supabase.table("bookings")
-            .select("*, places(id, name, banner_image_link, city, country)")
+            .select(BOOKING_VIEWS[view])
             .eq("user_id", user["id"])
-            .order("booking_date_time", desc=True)
-            .execute()
         )
-        rows = response.data or []
 
-        data = []
-        for row in rows:
-            place_data = row.pop("places", None)
-            row["place"] = place_data
-            data.append(row)
+        now = datetime.now(timezone.utc).isoformat()
+        if when == "upcoming":
+            query = query.gte(sort, now)
+        elif when == "past":
+            query = query.lt(sort, now)
+
+        if status:
+            statuses = [part.strip().upper() for part in status.split(",") if part.strip()]
+            query = query.in_("booking_status", statuses)
+
+        if cursor:
+            value, last_id = _decode_cursor(cursor, sort)
+            query = query.or_(_keyset_filter(sort, value, last_id, desc=desc))
+
+        # NULLs last in both directions, as _keyset_filter expects
+        query = query.order(sort, desc=desc, nullsfirst=False).order("id", desc=desc)
+        if limit is not None:
+            # Fetch one extra row to learn whether another page exists
+            query = query.limit(limit + 1)
+        response = await query.execute()
+        data = response.data or []
+
+        next_cursor = None
+        if limit is not None and len(data) > limit:
+            data = data[:limit]
+            next_cursor = _encode_cursor(sort, data[-1])
 
-        return {"success": True, "data": data, "count": len(data)}
+        return _conditional_json(
+            request,
+            {"success": True, "data": data, "count": len(data), "next_cursor": next_cursor},
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching bookings: {str(e)}")
 
 
+# ── Razorpay webhooks ────────────────────────────────────────────────────────
+#
+# Razorpay posts payment events here, so a booking is recorded even if the
+# browser never calls /api/bookings/verify. The endpoint only checks the
+# signature and enqueues the event; reconciliation runs on webhook_queue.
+
+RAZORPAY_WEBHOOK_SECRET = os.getenv("RAZORPAY_WEBHOOK_SECRET", "")
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "4"))
+WEBHOOK_QUEUE_MAX_SIZE = int(os.getenv("WEBHOOK_QUEUE_MAX_SIZE", "1000"))
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "5"))
+WEBHOOK_RETRY_BACKOFF_SECONDS = float(os.getenv("WEBHOOK_RETRY_BACKOFF_SECONDS", "2"))
+WEBHOOK_DRAIN_SECONDS = float(os.getenv("WEBHOOK_DRAIN_SECONDS", "10"))
+
+# Event ids already accepted, so Razorpay's redeliveries are not reprocessed.
+_seen_webhook_events = TTLCache(maxsize=WEBHOOK_QUEUE_MAX_SIZE * 10, ttl=24 * 3600)
+
+# Events that mean an order has been paid.
+PAID_EVENTS = {"payment.captured", "order.paid"}
+
+
+async def _reconcile_payment_event(event: dict) -> None:
+    """Record the booking for a paid order (no-op if already recorded)."""
+    payment = ((event.get("payload") or {}).get("payment") or {}).get("entity") or {}
+    order_id = payment.get("order_id")
+    payment_id = payment.get("id")
+    if not order_id or not payment_id:
+        return
+
+    details = await _get_booking_order(order_id)
+    if not details["user_id"] or not details["place_id"] or not details["booking_date_time"]:
+        logger.warning("Order %s has no booking details, skipping", order_id)
+        return
+    await _confirm_booking(order_id, payment_id, None, details)
+
+
+webhook_queue = WorkQueue(
+    "razorpay-webhooks",
+    _reconcile_payment_event,
+    concurrency=WEBHOOK_WORKERS,
+    maxsize=WEBHOOK_QUEUE_MAX_SIZE,
+    max_attempts=WEBHOOK_MAX_ATTEMPTS,
+    retry_backoff=WEBHOOK_RETRY_BACKOFF_SECONDS,
+)
+
+
+@app.post("/api/webhooks/razorpay", include_in_schema=False)
+async def razorpay_webhook(request: Request):
+    """Verify a Razorpay webhook and queue it for processing."""
+    if not RAZORPAY_WEBHOOK_SECRET:
+        raise HTTPException(status_code=503, detail="Webhooks are not configured")
+
+    body = await request.body()
+    expected = hmac.new(RAZORPAY_WEBHOOK_SECRET.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    if not hmac.compare_digest(expected, request.headers.get("x-razorpay-signature", "")):
+        raise HTTPException(status_code=400, detail="Invalid webhook signature")
+
+    try:
+        event = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid webhook payload")
+
+    if event.get("event") not in PAID_EVENTS:
+        return {"success": True, "queued": False}
+
+    event_id = request.headers.get("x-razorpay-event-id")
+    if event_id and _seen_webhook_events.get(event_id):
+        return {"success": True, "queued": False}
+    if not webhook_queue.put_nowait(event):
+        # Non-2xx makes Razorpay redeliver later
+        raise HTTPException(status_code=503, detail="Webhook queue is full", headers={"Retry-After": "5"})
+    if event_id:
+        _seen_webhook_events.set(event_id, True)
+    return {"success": True, "queued": True}
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -537,7 +2469,642 @@ async def root():
         "supabase_connected": supabase is not None,
     }
 
+# ── Place catalog mirror ─────────────────────────────────────────────────────
+#
+# Each worker keeps the visible rows of `places` in memory, loaded at startup
+# and refreshed in the background: every PLACE_CATALOG_REFRESH_SECONDS it
+# pulls rows whose updated_at moved, and every PLACE_CATALOG_FULL_RESYNC_SECONDS
+# it reloads everything (which also drops deleted rows). In-memory indexes
+# register with the catalog and are kept in step with it.
+
+PLACE_CATALOG_REFRESH_SECONDS = float(os.getenv("PLACE_CATALOG_REFRESH_SECONDS", "60"))
+PLACE_CATALOG_FULL_RESYNC_SECONDS = float(os.getenv("PLACE_CATALOG_FULL_RESYNC_SECONDS", "3600"))
+PLACE_CATALOG_BATCH_SIZE = int(os.getenv("PLACE_CATALOG_BATCH_SIZE", "1000"))
+
+
+def _parse_timestamp(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+class PlaceCatalog:
+    """In-memory mirror of visible places, kept fresh from `updated_at`.
+
+    Indexes are registered by name with a factory; they must implement
+    rebuild(rows), upsert(row) and remove(place_id). A full sync builds fresh
+    indexes in a worker thread and swaps them in, so readers on the event
+    loop always see a consistent index."""
+
+    def __init__(self):
+        self.rows: dict[str, dict] = {}
+        self.indexes: dict[str, object] = {}
+        self.ready = False
+        self.last_refresh_at: datetime | None = None
+        self._index_factories = {}
+        self._high_water: datetime | None = None
+        self._last_full_sync = 0.0
+        self._lock = asyncio.Lock()
+
+    def add_index(self, name: str, factory) -> None:
+        self._index_factories[name] = factory
+        self.indexes[name] = self._build_index(factory, list(self.rows.values()))
+
+    @staticmethod
+    def _build_index(factory, rows: list[dict]):
+        index = factory()
+        index.rebuild(rows)
+        return index
+
+    def _build_indexes(self, rows: list[dict]) -> dict[str, object]:
+        return {
+            name: self._build_index(factory, rows)
+            for name, factory in self._index_factories.items()
+        }
+
+    async def _fetch_rows(self, since: datetime | None) -> list[dict]:
+        """Page through `places` ordered by id, optionally only rows updated at
+        or after `since` (including hidden ones, so they can be dropped)."""
+        rows: list[dict] = []
+        last_id = None
+        while True:
+            query = supabase.table("places").select("*")
+            if since is None:
+                query = query.eq("visible", True)
+            else:
+                query = query.gte("updated_at", since.isoformat())
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            response = await query.order("id").limit(PLACE_CATALOG_BATCH_SIZE).execute()
+            batch = response.data or []
+            rows.extend(batch)
+            if len(batch) < PLACE_CATALOG_BATCH_SIZE:
+                return rows
+            last_id = batch[-1]["id"]
+
+    def _advance_high_water(self, rows) -> None:
+        for row in rows:
+            updated_at = _parse_timestamp(row.get("updated_at"))
+            if updated_at and (self._high_water is None or updated_at > self._high_water):
+                self._high_water = updated_at
+
+    async def refresh(self, full: bool = False) -> int:
+        """Apply changes from Supabase and return the number of rows touched."""
+        async with self._lock:
+            full = full or not self.ready or self._high_water is None
+            rows = await self._fetch_rows(None if full else self._high_water)
+
+            if full:
+                rows_by_id = {row["id"]: row for row in rows}
+                indexes = await asyncio.to_thread(self._build_indexes, list(rows_by_id.values()))
+                self.rows, self.indexes = rows_by_id, indexes
+                self._last_full_sync = time.monotonic()
+            else:
+                for row in rows:
+                    if row.get("visible"):
+                        self.rows[row["id"]] = row
+                        for index in self.indexes.values():
+                            index.upsert(row)
+                    elif self.rows.pop(row["id"], None) is not None:
+                        for index in self.indexes.values():
+                            index.remove(row["id"])
+
+            self._advance_high_water(rows)
+            self.ready = True
+            self.last_refresh_at = datetime.now(timezone.utc)
+            return len(rows)
+
+    async def refresh_safely(self, full: bool = False) -> None:
+        try:
+            await self.refresh(full=full)
+        except Exception as e:
+            logger.warning("Place catalog refresh failed: %s", e)
+
+    async def run_refresher(self) -> None:
+        """Background loop started from the app lifespan."""
+        while True:
+            await asyncio.sleep(PLACE_CATALOG_REFRESH_SECONDS)
+            full = time.monotonic() - self._last_full_sync >= PLACE_CATALOG_FULL_RESYNC_SECONDS
+            await self.refresh_safely(full=full)
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "places": len(self.rows),
+            "last_refresh_at": self.last_refresh_at.isoformat() if self.last_refresh_at else None,
+        }
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def _haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GeoGridIndex:
+    """Fixed-size lat/lng grid over place coordinates.
+
+    A radius query only visits the cells overlapping the query's bounding
+    box, then ranks candidates by haversine distance."""
+
+    def __init__(self, cell_deg: float = 0.1):
+        self.cell_deg = cell_deg
+        self._lng_cells = math.ceil(360 / cell_deg)
+        self._cells: dict[tuple[int, int], set[str]] = defaultdict(set)
+        self._points: dict[str, tuple[float, float]] = {}
+
+    def _cell(self, lat: float, lng: float) -> tuple[int, int]:
+        return (
+            math.floor((lat + 90) / self.cell_deg),
+            math.floor((lng + 180) / self.cell_deg) % self._lng_cells,
+        )
+
+    @staticmethod
+    def _coordinates(row: dict) -> tuple[float, float] | None:
+        try:
+            lat, lng = float(row["latitude"]), float(row["longitude"])
+        except (KeyError, TypeError, ValueError):
+            return None
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            return None
+        return lat, lng
+
+    def rebuild(self, rows) -> None:
+        self._cells = defaultdict(set)
+        self._points = {}
+        for row in rows:
+            self.upsert(row)
+
+    def upsert(self, row: dict) -> None:
+        self.remove(row["id"])
+        point = self._coordinates(row)
+        if point is None:
+            return
+        self._points[row["id"]] = point
+        self._cells[self._cell(*point)].add(row["id"])
+
+    def remove(self, place_id: str) -> None:
+        point = self._points.pop(place_id, None)
+        if point is None:
+            return
+        cell = self._cell(*point)
+        self._cells[cell].discard(place_id)
+        if not self._cells[cell]:
+            del self._cells[cell]
+
+    def nearby(self, lat: float, lng: float, radius_km: float, limit: int) -> list[tuple[float, str]]:
+        """Return up to `limit` (distance_km, place_id) pairs within `radius_km`,
+        nearest first."""
+        dlat = radius_km / 111.32
+        cos_lat = math.cos(math.radians(lat))
+        dlng = 180.0 if cos_lat < 1e-6 else min(180.0, radius_km / (111.32 * cos_lat))
+
+        lat_lo, lng_lo = self._cell(max(-90.0, lat - dlat), lng - dlng)
+        lat_hi = self._cell(min(90.0, lat + dlat), lng)[0]
+        lng_span = math.floor((lng + dlng + 180) / self.cell_deg) - math.floor((lng - dlng + 180) / self.cell_deg)
+        lng_indexes = {(lng_lo + i) % self._lng_cells for i in range(min(lng_span, self._lng_cells - 1) + 1)}
+
+        found = []
+        for lat_idx in range(lat_lo, lat_hi + 1):
+            for lng_idx in lng_indexes:
+                for place_id in self._cells.get((lat_idx, lng_idx), ()):
+                    distance = _haversine_km(lat, lng, *self._points[place_id])
+                    if distance <= radius_km:
+                        found.append((distance, place_id))
+        return heapq.nsmallest(limit, found)
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _normalize_text(text) -> str:
+    """Lowercase and strip accents so "Café" and "cafe" index the same."""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+
+def _tokenize(text) -> list[str]:
+    return _TOKEN_RE.findall(_normalize_text(text)) if text else []
+
+
+def _trigrams(token: str) -> set[str]:
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+def _single_deletes(token: str) -> set[str]:
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+def _edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Optimal-string-alignment distance, or max_distance + 1 once exceeded."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    prev2 = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if prev2 is not None and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > max_distance:
+            return max_distance + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+class PlaceSearchIndex:
+    """Inverted index over place text fields.
+
+    Each query term is matched against indexed tokens exactly, by prefix
+    (typeahead), by substring (via a trigram index) and, when none of those
+    hit, by edit distance (via a single-deletion index). Terms are ANDed and
+    places are ranked by the summed field-weighted match scores."""
+
+    FIELD_WEIGHTS = {
+        "name": 3.0,
+        "city": 2.0,
+        "category": 1.5,
+        "sub_category": 1.2,
+        "state": 1.0,
+        "country": 0.8,
+    }
+    MAX_PREFIX_EXPANSIONS = 500
+
+    def __init__(self):
+        self.rebuild(())
+
+    def rebuild(self, rows) -> None:
+        self._postings: dict[str, dict[str, float]] = {}
+        self._doc_tokens: dict[str, set[str]] = {}
+        self._doc_rating: dict[str, float] = {}
+        self._trigram_tokens: dict[str, set[str]] = defaultdict(set)
+        self._delete_tokens: dict[str, set[str]] = defaultdict(set)
+        self._sorted_tokens: list[str] = []
+        for row in rows:
+            self._add(row, keep_sorted=False)
+        self._sorted_tokens.sort()
+
+    def upsert(self, row: dict) -> None:
+        self.remove(row["id"])
+        self._add(row, keep_sorted=True)
+
+    def remove(self, place_id: str) -> None:
+        for token in self._doc_tokens.pop(place_id, ()):
+            postings = self._postings[token]
+            postings.pop(place_id, None)
+            if not postings:
+                self._drop_token(token)
+        self._doc_rating.pop(place_id, None)
+
+    def _add(self, row: dict, keep_sorted: bool) -> None:
+        place_id = row["id"]
+        weights: dict[str, float] = {}
+        for field, weight in self.FIELD_WEIGHTS.items():
+            for token in _tokenize(row.get(field)):
+                if weight > weights.get(token, 0.0):
+                    weights[token] = weight
+        for token, weight in weights.items():
+            if token not in self._postings:
+                self._postings[token] = {}
+                self._register_token(token, keep_sorted)
+            self._postings[token][place_id] = weight
+        self._doc_tokens[place_id] = set(weights)
+        try:
+            self._doc_rating[place_id] = float(row.get("rating") or 0)
+        except (TypeError, ValueError):
+            self._doc_rating[place_id] = 0.0
+
+    def _register_token(self, token: str, keep_sorted: bool) -> None:
+        if keep_sorted:
+            bisect.insort(self._sorted_tokens, token)
+        else:
+            self._sorted_tokens.append(token)
+        for gram in _trigrams(token):
+            self._trigram_tokens[gram].add(token)
+        for variant in _single_deletes(token) | {token}:
+            self._delete_tokens[variant].add(token)
+
+    def _drop_token(self, token: str) -> None:
+        del self._postings[token]
+        position = bisect.bisect_left(self._sorted_tokens, token)
+        if position < len(self._sorted_tokens) and self._sorted_tokens[position] == token:
+            del self._sorted_tokens[position]
+        for gram in _trigrams(token):
+            self._trigram_tokens[gram].discard(token)
+            if not self._trigram_tokens[gram]:
+                del self._trigram_tokens[gram]
+        for variant in _single_deletes(token) | {token}:
+            self._delete_tokens[variant].discard(token)
+            if not self._delete_tokens[variant]:
+                del self._delete_tokens[variant]
+
+    def _expand(self, term: str) -> dict[str, float]:
+        """Map indexed tokens matching `term` to a match-quality factor."""
+        matches: dict[str, float] = {}
+        if term in self._postings:
+            matches[term] = 1.0
+
+        start = bisect.bisect_left(self._sorted_tokens, term)
+        for token in itertools.islice(self._sorted_tokens, start, start + self.MAX_PREFIX_EXPANSIONS):
+            if not token.startswith(term):
+                break
+            if token != term:
+                matches[token] = 0.4 + 0.3 * len(term) / len(token)
+
+        grams = _trigrams(term)
+        if grams:
+            candidates = set.intersection(*(self._trigram_tokens.get(g, set()) for g in grams))
+            for token in candidates:
+                if token not in matches and term in token:
+                    matches[token] = 0.35
+
+        if not matches and len(term) >= 4:
+            max_distance = 1 if len(term) <= 7 else 2
+            candidates = set()
+            for variant in _single_deletes(term) | {term}:
+                candidates |= self._delete_tokens.get(variant, set())
+            for token in candidates:
+                if _edit_distance(term, token, max_distance) <= max_distance:
+                    matches[token] = 0.3
+        return matches
+
+    def search(self, query: str, limit: int) -> tuple[int, list[str]]:
+        """Return (total matches, ids of the best `limit` places)."""
+        terms = list(dict.fromkeys(_tokenize(query)))
+        if not terms:
+            return 0, []
+
+        scores: dict[str, float] | None = None
+        for term in terms:
+            term_scores: dict[str, float] = {}
+            for token, factor in self._expand(term).items():
+                for place_id, weight in self._postings[token].items():
+                    score = weight * factor
+                    if score > term_scores.get(place_id, 0.0):
+                        term_scores[place_id] = score
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {
+                    place_id: score + term_scores[place_id]
+                    for place_id, score in scores.items()
+                    if place_id in term_scores
+                }
+            if not scores:
+                return 0, []
+
+        best = heapq.nlargest(
+            limit,
+            scores,
+            key=lambda place_id: (scores[place_id], self._doc_rating.get(place_id, 0.0)),
+        )
+        return len(scores), best
+
+
+class _TrieNode:
+    __slots__ = ("children", "terminals", "top")
+
+    def __init__(self):
+        self.children: dict[str, "_TrieNode"] = {}
+        self.terminals: dict[str, float] = {}
+        self.top: list[tuple[float, str]] | None = None
+
+
+class SuggestionTrie:
+    """Character trie over place names and locations for typeahead.
+
+    Each place is inserted under its full name, every word-start suffix of
+    its name ("spice restaurant") and its city. Every node caches the top-k
+    (score, place_id) pairs of its subtree; updates only invalidate the
+    caches on the touched paths, which are recomputed on the next lookup."""
+
+    def __init__(self, k: int = 10):
+        self.k = k
+        self.rebuild(())
+
+    @staticmethod
+    def _keys(row: dict) -> dict[str, float]:
+        name_tokens = _tokenize(row.get("name"))
+        keys = {" ".join(name_tokens[i:]): 0.0 for i in range(len(name_tokens))}
+        if name_tokens:
+            keys[" ".join(name_tokens)] = 0.5
+        city = " ".join(_tokenize(row.get("city")))
+        if city:
+            keys.setdefault(city, 0.0)
+        return keys
+
+    def rebuild(self, rows) -> None:
+        self._root = _TrieNode()
+        self._place_keys: dict[str, list[str]] = {}
+        self.entries: dict[str, tuple] = {}
+        for row in rows:
+            self._add(row)
+        self._top(self._root)
+
+    def upsert(self, row: dict) -> None:
+        self.remove(row["id"])
+        self._add(row)
+
+    def remove(self, place_id: str) -> None:
+        self.entries.pop(place_id, None)
+        for key in self._place_keys.pop(place_id, ()):
+            node = self._root
+            node.top = None
+            for ch in key:
+                node = node.children[ch]
+                node.top = None
+            node.terminals.pop(place_id, None)
+
+    def _add(self, row: dict) -> None:
+        place_id = row["id"]
+        try:
+            rating = float(row.get("rating") or 0)
+        except (TypeError, ValueError):
+            rating = 0.0
+        keys = self._keys(row)
+        for key, boost in keys.items():
+            node = self._root
+            node.top = None
+            for ch in key:
+                node = node.children.setdefault(ch, _TrieNode())
+                node.top = None
+            node.terminals[place_id] = rating + boost
+        self._place_keys[place_id] = list(keys)
+        self.entries[place_id] = (place_id, row.get("name"), row.get("city"), row.get("category"))
+
+    def _top(self, node: _TrieNode) -> list[tuple[float, str]]:
+        if node.top is None:
+            best: dict[str, float] = dict(node.terminals)
+            for child in node.children.values():
+                for score, place_id in self._top(child):
+                    if score > best.get(place_id, -1.0):
+                        best[place_id] = score
+            node.top = heapq.nlargest(self.k, ((score, pid) for pid, score in best.items()))
+        return node.top
+
+    def suggest(self, prefix: str, limit: int) -> list[tuple]:
+        """Return up to `limit` (id, name, city, category) tuples for `prefix`."""
+        key = " ".join(_tokenize(prefix))
+        if prefix[-1:].isspace() and key:
+            key += " "
+        node = self._root
+        for ch in key:
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        return [self.entries[place_id] for _, place_id in self._top(node)[:limit]]
+
+
+place_catalog = PlaceCatalog()
+PLACE_GEO_CELL_DEGREES = float(os.getenv("PLACE_GEO_CELL_DEGREES", "0.1"))
+PLACE_SUGGEST_TOP_K = int(os.getenv("PLACE_SUGGEST_TOP_K", "10"))
+place_catalog.add_index("geo", lambda: GeoGridIndex(cell_deg=PLACE_GEO_CELL_DEGREES))
+place_catalog.add_index("search", PlaceSearchIndex)
+place_catalog.add_index("suggest", lambda: SuggestionTrie(k=PLACE_SUGGEST_TOP_K))
+
+
+# ── Place field projection ───────────────────────────────────────────────────
+#
+# Listing endpoints accept `view` (a named projection) or `fields` (a
+# comma-separated column list checked against PLACE_FIELDS). Without either
+# they keep returning every column. PLACE_FIELDS lists what clients may ask
+# for, including optional columns a deployment's table may not have; when
+# PostgREST rejects one, _raise_for_projection_error turns that into a 400.
+
+PLACE_FIELDS = frozenset({
+    "id", "name", "category", "sub_category", "description",
+    "banner_image_link", "images", "image_links", "rating", "avg_price",
+    "address", "city", "state", "country", "postal_code", "latitude",
+    "longitude", "location_map_link", "hours", "amenities", "website",
+    "phone_number", "review_count", "visible", "last_updated", "updated_at",
+})
+
+PLACE_VIEWS: dict[str, tuple[str, ...] | None] = {
+    # What PlaceCard and list pages render
+    "card": (
+        "id", "name", "category", "sub_category", "description",
+        "banner_image_link", "rating", "avg_price", "hours", "city", "state",
+        "country", "latitude", "longitude",
+    ),
+    "detail": None,
+}
+
+
+def _place_projection(
+    view: str | None, fields: str | None, required: tuple[str, ...] = ()
+) -> tuple[str, ...] | None:
+    """Resolve `fields`/`view` to an explicit column tuple, or None for all
+    columns. `id` and any `required` columns are always included."""
+    if fields:
+        columns = [column.strip() for column in fields.split(",") if column.strip()]
+        unknown = [column for column in columns if column not in PLACE_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    elif view:
+        columns = PLACE_VIEWS[view]
+        if columns is None:
+            return None
+    else:
+        return None
+    return tuple(dict.fromkeys(("id", *required, *columns)))
+
+
+def _select_columns(columns: tuple[str, ...] | None) -> str:
+    return "*" if columns is None else ",".join(columns)
+
+
+def _project_row(row: dict, columns: tuple[str, ...] | None) -> dict:
+    if columns is None:
+        return row
+    return {column: row[column] for column in columns if column in row}
+
+
+_MISSING_COLUMN = re.compile(r'column "?(?:\w+\.)?(\w+)"? does not exist')
+
+
+def _raise_for_projection_error(exc: Exception, columns: tuple[str, ...] | None) -> None:
+    """Raise a 400 naming the field when PostgREST rejects an explicit
+    projection because the table lacks one of its columns (Postgres 42703)."""
+    if columns is None or not isinstance(exc, APIError) or exc.code != "42703":
+        return
+    match = _MISSING_COLUMN.search(exc.message or "")
+    if match and match.group(1) in columns:
+        detail = f"Field not available: {match.group(1)}"
+    else:
+        detail = f"Field not available in: {', '.join(columns)}"
+    raise HTTPException(status_code=400, detail=detail) from exc
+
+
+# ── Places pagination helpers ────────────────────────────────────────────────
+
+# Sort keys allowed for cursor pagination, mapped to "descending?".
+# `id` is always appended as a tiebreaker in the same direction.
+PLACE_SORT_KEYS = {
+    "id": False,
+    "name": False,
+    "rating": True,
+    "updated_at": True,
+}
+
+
+def _encode_cursor(sort: str, row: dict) -> str:
+    """Encode the (sort_key, id) position of `row` as an opaque cursor."""
+    raw = json.dumps([sort, row.get(sort), row["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort: str) -> tuple:
+    """Decode a cursor produced by _encode_cursor for the same sort key."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, last_id = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor_sort != sort:
+        raise HTTPException(status_code=400, detail="Cursor does not match sort order")
+    return value, last_id
+
+
+def _pgrst_value(value) -> str:
+    """Quote a value for use inside a PostgREST or=(...) filter."""
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+def _keyset_filter(sort: str, value, last_id, desc: bool | None = None) -> str:
+    """Build an or=(...) filter selecting rows strictly after (value, last_id).
+
+    Rows are ordered by `sort` (NULLs last) and then by id in the same
+    direction, so the filter mirrors that ordering. `desc` defaults to the
+    direction in PLACE_SORT_KEYS."""
+    if desc is None:
+        desc = PLACE_SORT_KEYS[sort]
+    op = "lt" if desc else "gt"
+    after_id = f"id.{op}.{_pgrst_value(last_id)}"
+    if sort == "id":
+        return after_id
+    if value is None:
+        return f"and({sort}.is.null,{after_id})"
+    quoted = _pgrst_value(value)
+    return (
+        f"{sort}.{op}.{quoted},"
+        f"and({sort}.eq.{quoted},{after_id}),"
+        f"{sort}.is.null"
+    )
+
+
 @app.get("/api/places")
+@cached_response("places")
 async def get_places(
     limit: int = Query(100, ge=1, le=1000),
     offset: int = Query(0, ge=0),
@@ -545,6 +3112,12 @@ async def get_places(
     sub_category: str | None = None,
     city: str | None = None,
     country: str | None = None,
+    pagination: Literal["offset", "cursor"] = "offset",
+    cursor: str | None = None,
+    sort: Literal["id", "name", "rating", "updated_at"] = "id",
+    count: Literal["none", "planned", "estimated", "exact"] | None = None,
+    view: Literal["card", "detail"] | None = None,
+    fields: str | None = None,
 ):
     """
     Get places from the `places` table in Supabase.
@@ -552,11 +3125,22 @@ async def get_places(
     Supports optional filters used by the frontend:
     - limit, offset
     - category, sub_category, city, country (case-insensitive)
+    - view (card|detail) or fields (comma-separated columns) to trim rows
+
+    Cursor mode (`pagination=cursor`, implied by passing `cursor`) orders by
+    `sort` then id and returns `next_cursor` for the following page, so deep
+    pages cost the same as the first. `count` selects how the total is
+    computed; it defaults to `exact` in offset mode and `none` in cursor mode.
     """
+    use_cursor = pagination == "cursor" or cursor is not None
+    if count is None:
+        count = "none" if use_cursor else "exact"
+    columns = _place_projection(view, fields, required=(sort,) if use_cursor else ())
+
     try:
         query = (
             supabase.table("places")
-            .select("*", count="exact")
+            .select(_select_columns(columns), count=None if count == "none" else count)
             .eq("visible", True)
         )
 
@@ -569,21 +3153,46 @@ async def get_places(
         if country:
             query = query.ilike("country", f"%{country}%")
 
-        # Apply pagination using range (Supabase is inclusive on the end index)
-        start = offset
-        end = offset + limit - 1
-        query = query.range(start, end)
+        if use_cursor:
+            desc = PLACE_SORT_KEYS[sort]
+            if cursor:
+                value, last_id = _decode_cursor(cursor, sort)
+                query = query.or_(_keyset_filter(sort, value, last_id))
+            if sort != "id":
+                query = query.order(sort, desc=desc, nullsfirst=False)
+            # Fetch one extra row to learn whether another page exists
+            query = query.order("id", desc=desc).limit(limit + 1)
+        else:
+            # Apply pagination using range (Supabase is inclusive on the end index)
+            start = offset
+            end = offset + limit - 1
+            query = query.range(start, end)
 
-        response = query.execute()
+        response = await query.execute()
         data = response.data or []
-        count = getattr(response, "count", None) or len(data)
 
-        return {
+        next_cursor = None
+        if use_cursor and len(data) > limit:
+            data = data[:limit]
+            next_cursor = _encode_cursor(sort, data[-1])
+
+        if count == "none":
+            total = None
+        else:
+            total = getattr(response, "count", None) or len(data)
+
+        result = {
             "success": True,
             "data": data,
-            "count": count,
+            "count": total,
         }
+        if use_cursor:
+            result["next_cursor"] = next_cursor
+        return result
+    except HTTPException:
+        raise
     except Exception as e:
+        _raise_for_projection_error(e, columns)
         raise HTTPException(
             status_code=500,
             detail=f"Error fetching places from Supabase: {str(e)}",
@@ -591,17 +3200,37 @@ async def get_places(
 
 
 @app.get("/api/places/search")
+@cached_response("search")
 async def search_places(
     q: str = Query(..., min_length=1),
     limit: int = Query(20, ge=1, le=100),
+    view: Literal["card", "detail"] | None = None,
+    fields: str | None = None,
 ):
-    """Full-text style search across name, city, state, and country."""
+    """
+    Search places by name, city, state, country, category and sub_category.
+
+    Served from the in-memory search index (prefix, substring and typo
+    tolerant, relevance ranked). Until the place catalog has loaded, falls
+    back to an ilike query against Supabase.
+    """
+    columns = _place_projection(view, fields)
+
+    if place_catalog.ready:
+        total, place_ids = place_catalog.indexes["search"].search(q, limit)
+        data = [_project_row(place_catalog.rows[place_id], columns) for place_id in place_ids]
+        return {
+            "success": True,
+            "data": data,
+            "count": total,
+        }
+
     try:
         pattern = f"%{q}%"
 
         query = (
             supabase.table("places")
-            .select("*", count="exact")
+            .select(_select_columns(columns), count="exact")
             .eq("visible", True)
             .or_(
                 f"name.ilike.{pattern},"
@@ -612,7 +3241,7 @@ async def search_places(
             .limit(limit)
         )
 
-        response = query.execute()
+        response = await query.execute()
         data = response.data or []
         count = getattr(response, "count", None) or len(data)
 
@@ -622,20 +3251,209 @@ async def search_places(
             "count": count,
         }
     except Exception as e:
+        _raise_for_projection_error(e, columns)
         raise HTTPException(
             status_code=500,
             detail=f"Error searching places: {str(e)}",
         )
 
 
+@app.get("/api/places/suggest")
+async def suggest_places(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(8, ge=1, le=PLACE_SUGGEST_TOP_K),
+):
+    """
+    Typeahead suggestions for the search bar as compact
+    [id, name, city, category] tuples, served from the in-memory trie.
+    """
+    if not place_catalog.ready:
+        raise HTTPException(status_code=503, detail="Place index is not ready yet")
+
+    response.headers["Cache-Control"] = "public, max-age=60"
+    return {
+        "success": True,
+        "fields": ["id", "name", "city", "category"],
+        "data": place_catalog.indexes["suggest"].suggest(q, limit),
+    }
+
+
+@app.get("/api/places/featured")
+@cached_response("featured")
+async def get_featured_places(
+    limit: int = Query(10, ge=1, le=50),
+    view: Literal["card", "detail"] | None = None,
+    fields: str | None = None,
+):
+    """
+    Get a list of featured places.
+
+    If you have an `is_featured` column, this will prefer those rows.
+    Otherwise, it falls back to highest-rated visible places.
+    """
+    columns = _place_projection(view, fields)
+
+    try:
+        table = supabase.table("places")
+
+        # Try to use is_featured flag if it exists; if not, this will simply
+        # behave like a normal query and we order by rating.
+        query = (
+            table.select(_select_columns(columns))
+            .eq("visible", True)
+            .order("rating", desc=True)
+            .limit(limit)
+        )
+
+        response = await query.execute()
+        data = response.data or []
+
+        return {
+            "success": True,
+            "data": data,
+            "count": len(data),
+        }
+    except Exception as e:
+        _raise_for_projection_error(e, columns)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error fetching featured places: {str(e)}",
+        )
+
+
+@app.get("/api/places/nearby")
+async def get_nearby_places(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(10, gt=0, le=200),
+    limit: int = Query(20, ge=1, le=100),
+    view: Literal["card", "detail"] | None = None,
+    fields: str | None = None,
+):
+    """
+    Get visible places within `radius_km` of (lat, lng), nearest first.
+    Served from the in-memory spatial index; each row carries `distance_km`.
+    """
+    columns = _place_projection(view, fields)
+    if not place_catalog.ready:
+        raise HTTPException(status_code=503, detail="Place index is not ready yet")
+
+    data = []
+    for distance, place_id in place_catalog.indexes["geo"].nearby(lat, lng, radius_km, limit):
+        row = place_catalog.rows.get(place_id)
+        if row is not None:
+            data.append({**_project_row(row, columns), "distance_km": round(distance, 3)})
+
+    return {
+        "success": True,
+        "data": data,
+        "count": len(data),
+    }
+
+
+# ── Batch place lookup ───────────────────────────────────────────────────────
+#
+# Resolves many place ids in one request. With the catalog loaded every
+# visible place is already in memory; otherwise ids are looked up in a
+# per-place TTL cache and the misses are fetched with a single in_() query.
+
+PLACE_BATCH_MAX_IDS = int(os.getenv("PLACE_BATCH_MAX_IDS", "100"))
+PLACE_CACHE_TTL_SECONDS = float(os.getenv("PLACE_CACHE_TTL_SECONDS", "300"))
+PLACE_CACHE_MAX_SIZE = int(os.getenv("PLACE_CACHE_MAX_SIZE", "5000"))
+
+# Full visible place rows keyed by id; None marks a known-missing id.
+_place_cache = TTLCache(maxsize=PLACE_CACHE_MAX_SIZE, ttl=PLACE_CACHE_TTL_SECONDS)
+
+
+class PlaceBatchRequest(BaseModel):
+    ids: list[str] = Field(..., min_length=1, max_length=PLACE_BATCH_MAX_IDS)
+    view: Literal["card", "detail"] | None = None
+    fields: str | None = None
+
+
+async def _lookup_places(place_ids: list[str]) -> dict[str, dict | None]:
+    """Resolve ids to visible place rows (None when not found)."""
+    if place_catalog.ready:
+        return {place_id: place_catalog.rows.get(place_id) for place_id in place_ids}
+
+    found: dict[str, dict | None] = {}
+    misses = []
+    for place_id in place_ids:
+        cached = _place_cache.get(place_id, TTLCache._MISSING)
+        if cached is TTLCache._MISSING:
+            misses.append(place_id)
+        else:
+            found[place_id] = cached
+
+    if misses:
+        response = await (
+            supabase.table("places")
+            .select("*")
+            .in_("id", misses)
+            .eq("visible", True)
+            .execute()
+        )
+        rows = {row["id"]: row for row in (response.data or [])}
+        for place_id in misses:
+            found[place_id] = rows.get(place_id)
+            _place_cache.set(place_id, found[place_id])
+    return found
+
+
+async def _batch_places_response(place_ids: list[str], view: str | None, fields: str | None) -> dict:
+    columns = _place_projection(view, fields)
+    place_ids = list(dict.fromkeys(place_ids))
+    if len(place_ids) > PLACE_BATCH_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {PLACE_BATCH_MAX_IDS} ids per request")
+
+    try:
+        found = await _lookup_places(place_ids)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching places: {str(e)}")
+
+    data = [
+        _project_row(found[place_id], columns) if found[place_id] is not None else None
+        for place_id in place_ids
+    ]
+    return {
+        "success": True,
+        "data": data,
+        "missing": [place_id for place_id in place_ids if found[place_id] is None],
+        "count": sum(row is not None for row in data),
+    }
+
+
+@app.post("/api/places/batch")
+async def batch_places(body: PlaceBatchRequest):
+    """
+    Look up several places at once. `data` follows the order of `ids`
+    (duplicates removed) with null for ids that are missing or hidden;
+    those ids are also listed in `missing`.
+    """
+    return await _batch_places_response(body.ids, body.view, body.fields)
+
+
+@app.get("/api/places/batch")
+async def batch_places_get(
+    ids: str = Query(..., min_length=1),
+    view: Literal["card", "detail"] | None = None,
+    fields: str | None = None,
+):
+    """GET form of POST /api/places/batch with comma-separated `ids`."""
+    place_ids = [place_id.strip() for place_id in ids.split(",") if place_id.strip()]
+    return await _batch_places_response(place_ids, view, fields)
+
+
 @app.get("/api/places/{place_id}")
+@cached_response("place")
 async def get_place_by_id(place_id: str):
     """
     Get a single place by ID.
     Used by the Place Details page to show full information for a specific place.
     """
     try:
-        response = (
+        response = await (
             supabase.table("places")
             .select("*")
             .eq("id", place_id)
@@ -661,13 +3479,14 @@ async def get_place_by_id(place_id: str):
 
 
 @app.get("/api/places/{place_id}/gallery")
+@cached_response("gallery")
 async def get_place_gallery(place_id: str):
     """
     Get all gallery images for a place from the gallery_images table.
     Returns gallery_image_url from Supabase storage.
     """
     try:
-        response = (
+        response = await (
             supabase.table("gallery_images")
             .select("gallery_image_url")
             .eq("place_id", place_id)
@@ -690,51 +3509,46 @@ async def get_place_gallery(place_id: str):
         )
 
 
-@app.get("/api/places/featured")
-async def get_featured_places(limit: int = Query(10, ge=1, le=50)):
-    """
-    Get a list of featured places.
+def _cache_stats() -> dict:
+    """Hit/miss counters for the in-process caches, reported by /health."""
+    return {
+        "users": _user_cache.stats(),
+        "responses": response_cache.stats() if response_cache else None,
+        "place_catalog": place_catalog.stats(),
+        "og_pages": _og_cache.stats(),
+        "places": _place_cache.stats(),
+        "favorites": _favorites_cache.stats(),
+        "booking_orders": _booking_orders.stats(),
+        "confirmed_bookings": _confirmed_bookings.stats(),
+    }
 
-    If you have an `is_featured` column, this will prefer those rows.
-    Otherwise, it falls back to highest-rated visible places.
-    """
-    try:
-        table = supabase.table("places")
 
-        # Try to use is_featured flag if it exists; if not, this will simply
-        # behave like a normal query and we order by rating.
-        query = (
-            table.select("*")
-            .eq("visible", True)
-            .order("rating", desc=True)
-            .limit(limit)
-        )
+def _queue_stats() -> dict:
+    return {"razorpay_webhooks": webhook_queue.stats()}
 
-        response = query.execute()
-        data = response.data or []
 
-        return {
-            "success": True,
-            "data": data,
-            "count": len(data),
-        }
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error fetching featured places: {str(e)}",
-        )
+def _artifact_stats() -> dict:
+    """Build age and status of the background artifacts, reported by /health."""
+    return {"sitemap": sitemap_artifact.stats()}
 
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
+    if _draining:
+        return FastJSONResponse({"status": "draining", "service": "spotnere-api"}, status_code=503)
     try:
         # Test Supabase connection by making a simple query
-        result = supabase.table("places").select("id").limit(1).execute()
+        await supabase.table("places").select("id").limit(1).execute()
         return {
             "status": "healthy",
             "service": "spotnere-api",
             "supabase": "connected",
+            "caches": _cache_stats(),
+            "artifacts": _artifact_stats(),
+            "queues": _queue_stats(),
+            "razorpay": razorpay_gateway.breaker.stats(),
+            "admission": _admission_stats(),
         }
     except Exception as e:
         return {
@@ -742,28 +3556,38 @@ async def health_check():
             "service": "spotnere-api",
             "supabase": "disconnected",
             "error": str(e),
+            "caches": _cache_stats(),
+            "artifacts": _artifact_stats(),
+            "queues": _queue_stats(),
+            "razorpay": razorpay_gateway.breaker.stats(),
+            "admission": _admission_stats(),
         }
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics in the text exposition format."""
+    return Response(_render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 # ── OpenGraph HTML for social crawlers ────────────────────────────────────────
 
-@app.get("/og/place/{place_id}", include_in_schema=False)
-async def og_place(place_id: str):
-    """Return a minimal HTML page with OpenGraph meta tags for a place.
-    This is served to social media crawlers via Vercel conditional rewrites."""
-    site_url = os.getenv("SITE_BASE_URL", "https://www.spotnere.com")
+# Rendered pages are kept in a bounded TTL+LRU cache keyed by place id. While
+# the place catalog is loaded, an entry is reused only if the place's
+# updated_at still matches, and no Supabase query is needed at all.
 
-    try:
-        response = (
-            supabase.table("places")
-            .select("id, name, description, banner_image_link, city, state, country, category, rating, avg_price")
-            .eq("id", place_id)
-            .eq("visible", True)
-            .single()
-            .execute()
-        )
-        place = response.data
-    except Exception:
-        place = None
+OG_CACHE_MAX_SIZE = int(os.getenv("OG_CACHE_MAX_SIZE", "5000"))
+OG_CACHE_TTL_SECONDS = float(os.getenv("OG_CACHE_TTL_SECONDS", "3600"))
+OG_NOT_FOUND_TTL_SECONDS = 60
+# Renders every catalog place right after the initial catalog load: before
+# serving with PRELOAD_PLACE_CATALOG (the default), in the background without.
+OG_PRERENDER_ON_STARTUP = os.getenv("OG_PRERENDER_ON_STARTUP", "false").lower() in ("1", "true", "yes")
+
+_og_cache = TTLCache(maxsize=OG_CACHE_MAX_SIZE, ttl=OG_CACHE_TTL_SECONDS)
+
+
+def _render_og_html(place: dict | None) -> str:
+    """Render the OpenGraph HTML page for `place` (None renders "not found")."""
+    site_url = os.getenv("SITE_BASE_URL", "https://www.spotnere.com")
 
     if not place:
         title = "Place not found — Spotnere"
@@ -823,92 +3647,368 @@ async def og_place(place_id: str):
 </body>
 </html>"""
 
-    return Response(content=html, media_type="text/html")
+    return html
 
 
-# ── Sitemap & Robots.txt ─────────────────────────────────────────────────────
+def _og_entry(place: dict | None) -> dict:
+    html = _render_og_html(place)
+    return {
+        "found": place is not None,
+        "updated_at": place.get("updated_at") if place else None,
+        "html": html,
+        "etag": _etag_for(html.encode()),
+    }
 
-SITE_BASE_URL = os.getenv("SITE_BASE_URL", "https://www.spotnere.com")
-_sitemap_cache: dict = {"xml": None, "generated_at": None}
-SITEMAP_CACHE_TTL_SECONDS = 3600
 
+def _cache_og_entry(place_id: str, entry: dict) -> None:
+    _og_cache.set(place_id, entry, ttl=None if entry["found"] else OG_NOT_FOUND_TTL_SECONDS)
 
-def _build_sitemap_xml() -> str:
-    """Generate sitemap XML with static pages and all visible place pages."""
-    now = datetime.now(timezone.utc).strftime("%Y-%m-%d")
 
-    static_pages = [
-        {"loc": "/", "changefreq": "daily", "priority": "1.0"},
-        {"loc": "/about", "changefreq": "monthly", "priority": "0.5"},
-        {"loc": "/contact", "changefreq": "monthly", "priority": "0.5"},
-    ]
+async def _get_og_entry(place_id: str) -> dict:
+    """Return the cached OG page for `place_id`, re-rendering it when missing,
+    expired or (with the catalog loaded) older than the place's updated_at."""
+    cached = _og_cache.get(place_id)
 
-    urls = []
-    for page in static_pages:
-        urls.append(
-            f"  <url>\n"
-            f"    <loc>{SITE_BASE_URL}{page['loc']}</loc>\n"
-            f"    <lastmod>{now}</lastmod>\n"
-            f"    <changefreq>{page['changefreq']}</changefreq>\n"
-            f"    <priority>{page['priority']}</priority>\n"
-            f"  </url>"
-        )
+    if place_catalog.ready:
+        place = place_catalog.rows.get(place_id)
+        if (
+            cached is not None
+            and cached["found"] == (place is not None)
+            and cached["updated_at"] == (place.get("updated_at") if place else None)
+        ):
+            return cached
+        entry = _og_entry(place)
+        _cache_og_entry(place_id, entry)
+        return entry
 
+    if cached is not None:
+        return cached
     try:
-        response = (
+        response = await (
             supabase.table("places")
-            .select("id, updated_at")
+            .select("id, name, description, banner_image_link, city, state, country, category, rating, avg_price, updated_at")
+            .eq("id", place_id)
             .eq("visible", True)
+            .maybe_single()
             .execute()
         )
-        places = response.data or []
+        place = response.data if response else None
     except Exception:
-        places = []
+        # Don't cache a transient failure as "not found"
+        return _og_entry(None)
+    entry = _og_entry(place)
+    _cache_og_entry(place_id, entry)
+    return entry
+
+
+def _prerender_og_pages() -> int:
+    """Warm the OG cache from the place catalog; returns pages rendered."""
+    rendered = 0
+    for place in itertools.islice(place_catalog.rows.values(), OG_CACHE_MAX_SIZE):
+        _cache_og_entry(place["id"], _og_entry(place))
+        rendered += 1
+    return rendered
+
+
+async def _load_place_catalog() -> None:
+    """Initial full catalog load, followed by the optional OG prerender
+    (which renders from the catalog rows, so it has to wait for them)."""
+    await place_catalog.refresh_safely(full=True)
+    if not OG_PRERENDER_ON_STARTUP:
+        return
+    if place_catalog.ready:
+        logger.info("Pre-rendered %d OG pages", _prerender_og_pages())
+    else:
+        logger.warning("OG_PRERENDER_ON_STARTUP is set but the place catalog did not load; skipping prerender")
 
-    for place in places:
-        lastmod = now
-        if place.get("updated_at"):
-            try:
-                lastmod = place["updated_at"][:10]
-            except (TypeError, IndexError):
-                pass
-        urls.append(
-            f"  <url>\n"
-            f"    <loc>{SITE_BASE_URL}/place/{place['id']}</loc>\n"
-            f"    <lastmod>{lastmod}</lastmod>\n"
-            f"    <changefreq>weekly</changefreq>\n"
-            f"    <priority>0.8</priority>\n"
-            f"  </url>"
-        )
-
-    xml = (
+
+@app.get("/og/place/{place_id}", include_in_schema=False)
+async def og_place(place_id: str, request: Request):
+    """Return a minimal HTML page with OpenGraph meta tags for a place.
+    This is served to social media crawlers via Vercel conditional rewrites."""
+    entry = await _get_og_entry(place_id)
+    headers = {
+        "ETag": entry["etag"],
+        "Cache-Control": "public, max-age=300, s-maxage=3600" if entry["found"] else "public, max-age=60",
+    }
+    if _etag_matches(request.headers.get("if-none-match"), entry["etag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry["html"], media_type="text/html", headers=headers)
+
+
+# ── Sitemap & Robots.txt ─────────────────────────────────────────────────────
+
+SITE_BASE_URL = os.getenv("SITE_BASE_URL", "https://www.spotnere.com")
+SITEMAP_MAX_URLS = 50_000  # per-file limit from the sitemaps.org protocol
+SITEMAP_BATCH_SIZE = int(os.getenv("SITEMAP_BATCH_SIZE", "1000"))
+
+SITEMAP_STATIC_PAGES = [
+    {"loc": "/", "changefreq": "daily", "priority": "1.0"},
+    {"loc": "/about", "changefreq": "monthly", "priority": "0.5"},
+    {"loc": "/contact", "changefreq": "monthly", "priority": "0.5"},
+]
+
+# Places per child sitemap; the first child also carries the static pages.
+SITEMAP_PLACES_PER_SHARD = SITEMAP_MAX_URLS - len(SITEMAP_STATIC_PAGES)
+
+
+def _sitemap_url(loc: str, lastmod: str, changefreq: str, priority: str) -> str:
+    return (
+        f"  <url>\n"
+        f"    <loc>{loc}</loc>\n"
+        f"    <lastmod>{lastmod}</lastmod>\n"
+        f"    <changefreq>{changefreq}</changefreq>\n"
+        f"    <priority>{priority}</priority>\n"
+        f"  </url>\n"
+    )
+
+
+async def _count_sitemap_places() -> int:
+    response = await (
+        supabase.table("places")
+        .select("id", count="exact")
+        .eq("visible", True)
+        .limit(1)
+        .execute()
+    )
+    return response.count or 0
+
+
+def _sitemap_shard_count(place_count: int) -> int:
+    """Number of child sitemaps needed, or 0 when a single file suffices."""
+    if place_count + len(SITEMAP_STATIC_PAGES) <= SITEMAP_MAX_URLS:
+        return 0
+    return math.ceil(place_count / SITEMAP_PLACES_PER_SHARD)
+
+
+async def _iter_sitemap_place_batches(offset: int, limit: int | None):
+    """Yield batches of visible (id, updated_at) rows ordered by id, starting
+    at `offset` and stopping after `limit` rows (None for all). Pages by
+    keyset on id after the first batch."""
+    remaining = limit
+    last_id = None
+    while remaining is None or remaining > 0:
+        size = SITEMAP_BATCH_SIZE if remaining is None else min(SITEMAP_BATCH_SIZE, remaining)
+        query = (
+            supabase.table("places")
+            .select("id, updated_at")
+            .eq("visible", True)
+            .order("id")
+        )
+        if last_id is None:
+            query = query.range(offset, offset + size - 1)
+        else:
+            query = query.gt("id", last_id).limit(size)
+        batch = (await query.execute()).data or []
+        if batch:
+            yield batch
+        if len(batch) < size:
+            return
+        if remaining is not None:
+            remaining -= len(batch)
+        last_id = batch[-1]["id"]
+
+
+async def _sitemap_urlset_chunks(shard: int | None = None, strict: bool = False):
+    """Stream a <urlset> document one batch of places at a time.
+
+    `shard` selects the 1-based child sitemap; None emits every place.
+    Unless `strict`, a Supabase error ends the document early instead of
+    raising, since a streamed response can no longer change its status."""
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+    yield (
         '<?xml version="1.0" encoding="UTF-8"?>\n'
         '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
-        + "\n".join(urls) + "\n"
-        "</urlset>\n"
     )
-    return xml
+    if shard in (None, 1):
+        yield "".join(
+            _sitemap_url(f"{SITE_BASE_URL}{page['loc']}", now, page["changefreq"], page["priority"])
+            for page in SITEMAP_STATIC_PAGES
+        )
 
+    if shard is None:
+        offset, limit = 0, None
+    else:
+        offset, limit = (shard - 1) * SITEMAP_PLACES_PER_SHARD, SITEMAP_PLACES_PER_SHARD
 
-@app.get("/sitemap.xml", include_in_schema=False)
-async def sitemap():
-    """Serve a dynamic XML sitemap. Cached for 1 hour."""
-    now = datetime.now(timezone.utc)
-    if (
-        _sitemap_cache["xml"] is None
-        or _sitemap_cache["generated_at"] is None
-        or (now - _sitemap_cache["generated_at"]).total_seconds() > SITEMAP_CACHE_TTL_SECONDS
-    ):
-        _sitemap_cache["xml"] = _build_sitemap_xml()
-        _sitemap_cache["generated_at"] = now
+    try:
+        async for batch in _iter_sitemap_place_batches(offset, limit):
+            chunk = []
+            for place in batch:
+                lastmod = now
+                if place.get("updated_at"):
+                    try:
+                        lastmod = place["updated_at"][:10]
+                    except (TypeError, IndexError):
+                        pass
+                chunk.append(
+                    _sitemap_url(f"{SITE_BASE_URL}/place/{place['id']}", lastmod, "weekly", "0.8")
+                )
+            yield "".join(chunk)
+    except Exception as e:
+        if strict:
+            raise
+        # Headers are already sent; end the document so it stays valid XML
+        logger.warning("Sitemap generation stopped early: %s", e)
+
+    yield "</urlset>\n"
+
+
+async def _sitemap_index_chunks(shards: int, gzipped: bool):
+    """Stream a <sitemapindex> pointing at the numbered child sitemaps."""
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    suffix = ".xml.gz" if gzipped else ".xml"
+    yield (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    )
+    for shard in range(1, shards + 1):
+        yield (
+            f"  <sitemap>\n"
+            f"    <loc>{SITE_BASE_URL}/sitemaps/sitemap-{shard}{suffix}</loc>\n"
+            f"    <lastmod>{now}</lastmod>\n"
+            f"  </sitemap>\n"
+        )
+    yield "</sitemapindex>\n"
+
+
+async def _gzip_chunks(chunks):
+    """Gzip-compress an async stream of text chunks on the fly."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _sitemap_response(chunks, gzipped: bool) -> StreamingResponse:
+    headers = {"Cache-Control": "public, max-age=3600"}
+    if gzipped:
+        return StreamingResponse(_gzip_chunks(chunks), media_type="application/gzip", headers=headers)
+    return StreamingResponse(chunks, media_type="application/xml", headers=headers)
 
-    return Response(
-        content=_sitemap_cache["xml"],
-        media_type="application/xml",
-        headers={"Cache-Control": "public, max-age=3600"},
+
+# The sitemap is rebuilt in the background every SITEMAP_REFRESH_SECONDS into
+# a fresh directory of .xml/.xml.gz files, and requests are answered from the
+# last good build. Until the first build lands they are streamed live.
+
+SITEMAP_REFRESH_SECONDS = float(os.getenv("SITEMAP_REFRESH_SECONDS", "3600"))
+
+
+async def _write_sitemap_files(directory: str, name: str, chunks) -> None:
+    """Write `chunks` to <name>.xml and a gzipped <name>.xml.gz in one pass."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    with open(os.path.join(directory, f"{name}.xml"), "wb") as plain, \
+            open(os.path.join(directory, f"{name}.xml.gz"), "wb") as gz:
+        async for chunk in chunks:
+            data = chunk.encode()
+            plain.write(data)
+            gz.write(compressor.compress(data))
+        gz.write(compressor.flush())
+
+
+async def _build_sitemap_artifact(previous: dict | None) -> dict:
+    """Render every sitemap document to disk and return the new generation.
+
+    The generation before `previous` is deleted; `previous` itself is kept
+    so responses already pointing at its files can finish."""
+    shards = _sitemap_shard_count(await _count_sitemap_places())
+    directory = tempfile.mkdtemp(prefix="spotnere-sitemap-")
+    try:
+        if shards:
+            await _write_sitemap_files(directory, "sitemap", _sitemap_index_chunks(shards, gzipped=False))
+            # The gzipped index must point at gzipped children
+            await _write_sitemap_files(directory, "sitemap-index-gz", _sitemap_index_chunks(shards, gzipped=True))
+            for shard in range(1, shards + 1):
+                await _write_sitemap_files(
+                    directory, f"sitemap-{shard}", _sitemap_urlset_chunks(shard, strict=True)
+                )
+        else:
+            await _write_sitemap_files(directory, "sitemap", _sitemap_urlset_chunks(strict=True))
+    except BaseException:
+        shutil.rmtree(directory, ignore_errors=True)
+        raise
+
+    if previous and previous["previous_dir"]:
+        shutil.rmtree(previous["previous_dir"], ignore_errors=True)
+    return {
+        "dir": directory,
+        "shards": shards,
+        "previous_dir": previous["dir"] if previous else None,
+    }
+
+
+def _discard_sitemap_artifact(artifact: dict) -> None:
+    for directory in (artifact["dir"], artifact["previous_dir"]):
+        if directory:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+sitemap_artifact = BackgroundArtifact(
+    "sitemap",
+    _build_sitemap_artifact,
+    interval=SITEMAP_REFRESH_SECONDS,
+    discard=_discard_sitemap_artifact,
+)
+
+
+def _sitemap_file_response(name: str, gzipped: bool) -> FileResponse:
+    artifact = sitemap_artifact.value
+    if gzipped and name == "sitemap" and artifact["shards"]:
+        name = "sitemap-index-gz"
+    path = os.path.join(artifact["dir"], f"{name}.xml.gz" if gzipped else f"{name}.xml")
+    return FileResponse(
+        path,
+        media_type="application/gzip" if gzipped else "application/xml",
+        headers={
+            "Cache-Control": "public, max-age=3600",
+            "X-Artifact-Age": str(int(sitemap_artifact.age_seconds() or 0)),
+        },
     )
 
 
+@app.get("/sitemap.xml", include_in_schema=False)
+@app.get("/sitemap.xml.gz", include_in_schema=False)
+async def sitemap(request: Request):
+    """Serve the XML sitemap, or a sitemap index once the catalog outgrows a
+    single file. The .gz variant is gzip-compressed."""
+    gzipped = request.url.path.endswith(".gz")
+    if sitemap_artifact.value is not None:
+        return _sitemap_file_response("sitemap", gzipped)
+
+    try:
+        shards = _sitemap_shard_count(await _count_sitemap_places())
+    except Exception as e:
+        logger.warning("Sitemap place count failed: %s", e)
+        shards = 0
+
+    if shards:
+        return _sitemap_response(_sitemap_index_chunks(shards, gzipped), gzipped)
+    return _sitemap_response(_sitemap_urlset_chunks(), gzipped)
+
+
+@app.get("/sitemaps/sitemap-{shard:int}.xml", include_in_schema=False)
+@app.get("/sitemaps/sitemap-{shard:int}.xml.gz", include_in_schema=False)
+async def sitemap_shard(shard: int, request: Request):
+    """Serve one numbered child sitemap of the sitemap index."""
+    gzipped = request.url.path.endswith(".gz")
+    if sitemap_artifact.value is not None:
+        if not 1 <= shard <= sitemap_artifact.value["shards"]:
+            raise HTTPException(status_code=404, detail="Sitemap not found")
+        return _sitemap_file_response(f"sitemap-{shard}", gzipped)
+
+    try:
+        shards = _sitemap_shard_count(await _count_sitemap_places())
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Sitemap unavailable: {str(e)}")
+    if not 1 <= shard <= shards:
+        raise HTTPException(status_code=404, detail="Sitemap not found")
+
+    return _sitemap_response(_sitemap_urlset_chunks(shard), gzipped)
+
+
 @app.get("/robots.txt", include_in_schema=False)
 async def robots_txt():
     """Serve robots.txt with sitemap reference."""
@@ -925,15 +4025,120 @@ async def robots_txt():
     return Response(content=content, media_type="text/plain")
 
 
+# ── Server process ───────────────────────────────────────────────────────────
+# `python main.py` runs a production server: one worker per CPU, uvloop and
+# httptools when installed, and graceful draining on SIGTERM. Each worker
+# loads the place catalog (and optionally the sitemap and OG pages) in the
+# lifespan before it starts accepting connections. SERVER_RELOAD=true gives
+# the old single-process auto-reloading dev server instead.
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    return os.getenv(name, "true" if default else "false").lower() in ("1", "true", "yes")
+
+
+def _installed(module: str) -> bool:
+    try:
+        __import__(module)
+    except ImportError:
+        return False
+    return True
+
+
+SERVER_RELOAD = _env_flag("SERVER_RELOAD", False)
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "0")) or os.cpu_count() or 1
+SERVER_KEEPALIVE_SECONDS = int(os.getenv("SERVER_KEEPALIVE_SECONDS", "75"))
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", "2048"))
+SERVER_LIMIT_CONCURRENCY = int(os.getenv("SERVER_LIMIT_CONCURRENCY", "0")) or None
+SERVER_MAX_REQUESTS = int(os.getenv("SERVER_MAX_REQUESTS", "0")) or None
+SERVER_GRACEFUL_SHUTDOWN_SECONDS = float(os.getenv("SERVER_GRACEFUL_SHUTDOWN_SECONDS", "30"))
+# Time between SIGTERM and closing the listening socket, during which
+# /health answers 503 so load balancers stop routing new requests here.
+SERVER_DRAIN_DELAY_SECONDS = float(os.getenv("SERVER_DRAIN_DELAY_SECONDS", "0"))
+# Proxies whose X-Forwarded-For is trusted; per-IP rate limits depend on it.
+SERVER_FORWARDED_ALLOW_IPS = os.getenv("SERVER_FORWARDED_ALLOW_IPS", os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1"))
+SERVER_ACCESS_LOG = _env_flag("SERVER_ACCESS_LOG", True)
+SERVER_LOG_LEVEL = os.getenv("SERVER_LOG_LEVEL", "INFO").upper()
+
+PRELOAD_PLACE_CATALOG = _env_flag("PRELOAD_PLACE_CATALOG", True)
+PRELOAD_SITEMAP = _env_flag("PRELOAD_SITEMAP", False)
+
+_draining = False
+
+
+def _install_drain_handler() -> None:
+    """Wrap the server's SIGTERM/SIGINT handlers so the worker reports itself
+    as draining first, optionally waiting SERVER_DRAIN_DELAY_SECONDS before
+    the server stops accepting connections. Called from the lifespan, after
+    uvicorn has installed its own handlers."""
+    if threading.current_thread() is not threading.main_thread():
+        return
+    loop = asyncio.get_running_loop()
+
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        previous = signal.getsignal(sig)
+        if not callable(previous):
+            continue
+
+        def handle(signum, frame, previous=previous):
+            global _draining
+            if _draining or SERVER_DRAIN_DELAY_SECONDS <= 0:
+                _draining = True
+                previous(signum, frame)
+                return
+            _draining = True
+            logger.info("Draining for %.0fs before shutdown", SERVER_DRAIN_DELAY_SECONDS)
+            loop.call_soon_threadsafe(loop.call_later, SERVER_DRAIN_DELAY_SECONDS, previous, signum, None)
+
+        signal.signal(sig, handle)
+
+
+def _server_log_config() -> dict:
+    """uvicorn's logging config plus this module's `spotnere` loggers, so app
+    messages (worker settings, draining, cache and gateway warnings) are
+    printed by every worker process."""
+    from uvicorn.config import LOGGING_CONFIG
+
+    config = copy.deepcopy(LOGGING_CONFIG)
+    config["loggers"]["spotnere"] = {"handlers": ["default"], "level": SERVER_LOG_LEVEL, "propagate": False}
+    return config
+
+
+def _server_options() -> dict:
+    """Keyword arguments for uvicorn.run()."""
+    options = {
+        "host": os.getenv("HOST", "0.0.0.0"),
+        "port": int(os.getenv("PORT", "8000")),
+        "loop": "uvloop" if _installed("uvloop") else "asyncio",
+        "http": "httptools" if _installed("httptools") else "h11",
+        "timeout_keep_alive": SERVER_KEEPALIVE_SECONDS,
+        "backlog": SERVER_BACKLOG,
+        "proxy_headers": True,
+        "forwarded_allow_ips": SERVER_FORWARDED_ALLOW_IPS,
+        "access_log": SERVER_ACCESS_LOG,
+        "log_config": _server_log_config(),
+    }
+    if SERVER_RELOAD:
+        return {**options, "reload": True}
+    return {
+        **options,
+        "workers": WEB_CONCURRENCY,
+        "limit_concurrency": SERVER_LIMIT_CONCURRENCY,
+        "limit_max_requests": SERVER_MAX_REQUESTS,
+        "timeout_graceful_shutdown": SERVER_GRACEFUL_SHUTDOWN_SECONDS + SERVER_DRAIN_DELAY_SECONDS,
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
-    
-    host = os.getenv("HOST", "0.0.0.0")
-    port = int(os.getenv("PORT", "8000"))
-    
-    uvicorn.run(
-        "main:app",
-        host=host,
-        port=port,
-        reload=True,
+
+    options = _server_options()
+    logging.config.dictConfig(options["log_config"])
+    logger.info(
+        "Starting %s server: %s worker(s), loop=%s, http=%s, keep-alive=%ss, backlog=%s, "
+        "drain delay=%ss, graceful shutdown=%ss",
+        "reloading dev" if SERVER_RELOAD else "production",
+        options.get("workers", 1), options["loop"], options["http"], SERVER_KEEPALIVE_SECONDS,
+        SERVER_BACKLOG, SERVER_DRAIN_DELAY_SECONDS, SERVER_GRACEFUL_SHUTDOWN_SECONDS,
     )
+    uvicorn.run("main:app", **options)
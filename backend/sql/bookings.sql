@@ -0,0 +1,6 @@
+-- Bookings: one row per Razorpay order, so payment verification can be
+-- retried safely (the API upserts on this key and ignores duplicates).
+-- Remove any duplicate razorpay_order_id rows before applying.
+
+alter table public.bookings
+  add constraint bookings_razorpay_order_id_key unique (razorpay_order_id);
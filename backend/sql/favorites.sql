@@ -0,0 +1,59 @@
+-- Favorites: atomic toggle and bulk sync for public.user_places.
+-- Apply once in the Supabase SQL editor (or psql) before deploying the API
+-- that calls these functions.
+
+-- One row per (user, place); duplicates must be removed before this runs.
+alter table public.user_places
+  add constraint user_places_user_id_fav_place_id_key unique (user_id, fav_place_id);
+
+
+-- Flip a single favorite and return the new state (true = favorited).
+-- The advisory lock serialises concurrent toggles of the same pair, so a
+-- double tap always nets out instead of racing on the insert.
+create or replace function public.toggle_favorite(p_user_id uuid, p_place_id uuid)
+returns boolean
+language plpgsql
+as $$
+begin
+  perform pg_advisory_xact_lock(hashtextextended(p_user_id::text || ':' || p_place_id::text, 0));
+
+  delete from public.user_places
+   where user_id = p_user_id and fav_place_id = p_place_id;
+  if found then
+    return false;
+  end if;
+
+  insert into public.user_places (user_id, fav_place_id)
+  values (p_user_id, p_place_id)
+  on conflict (user_id, fav_place_id) do nothing;
+  return true;
+end;
+$$;
+
+
+-- Apply a batch of removals and additions in one transaction and return the
+-- user's resulting favorites.
+create or replace function public.sync_favorites(
+  p_user_id uuid,
+  p_add uuid[] default '{}',
+  p_remove uuid[] default '{}'
+)
+returns table (fav_place_id uuid)
+language plpgsql
+as $$
+begin
+  delete from public.user_places up
+   where up.user_id = p_user_id and up.fav_place_id = any(p_remove);
+
+  -- Name the constraint: the output column makes `fav_place_id` a PL/pgSQL
+  -- variable here, so a column-list conflict target would be ambiguous.
+  insert into public.user_places (user_id, fav_place_id)
+  select p_user_id, unnest(p_add)
+  on conflict on constraint user_places_user_id_fav_place_id_key do nothing;
+
+  return query
+    select up.fav_place_id from public.user_places up
+     where up.user_id = p_user_id
+     order by up.id;
+end;
+$$;
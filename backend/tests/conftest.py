@@ -0,0 +1,111 @@
+"""Shared fixtures: the API wired to the in-process fakes from bench/.
+
+Settings are read from the environment when main.py is imported, so they
+are set here before anything imports it. Rate limiting is off by default;
+tests that need it install a backend themselves.
+"""
+
+import os
+import sys
+
+os.environ.update({
+    "SUPABASE_URL": "http://fake-postgrest",
+    "SUPABASE_KEY": "test",
+    "JWT_SECRET": "test-jwt-secret-with-at-least-32-bytes",
+    "RAZORPAY_KEY_ID": "rzp_test_key",
+    "RAZORPAY_KEY_SECRET": "test-razorpay-secret",
+    "RAZORPAY_API_BASE_URL": "http://fake-razorpay/v1",
+    "RATE_LIMIT_BACKEND": "none",
+    "RESPONSE_CACHE_BACKEND": "memory",
+})
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hashlib  # noqa: E402
+import hmac  # noqa: E402
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from bench import data, fake_postgrest, fake_razorpay  # noqa: E402
+
+SCALE = 60
+SEED = 7
+
+
+@pytest.fixture(scope="session")
+def password_hash() -> str:
+    return main._hash_password(data.BENCH_PASSWORD)
+
+
+@pytest.fixture
+def postgrest(password_hash):
+    """A fresh fake PostgREST app; its rows are in `postgrest.state.store.tables`."""
+    return fake_postgrest.create_app(SCALE, SEED, password_hash)
+
+
+@pytest.fixture
+def store(postgrest):
+    return postgrest.state.store
+
+
+@pytest.fixture
+def razorpay():
+    return fake_razorpay.create_app(latency_ms=0, error_rate=0)
+
+
+def _clear_process_state() -> None:
+    for cache in (
+        main._user_cache, main._favorites_cache, main._booking_orders, main._confirmed_bookings,
+        main._seen_webhook_events, main._place_cache, main._og_cache,
+    ):
+        cache.clear()
+
+
+@pytest.fixture
+def app(postgrest, razorpay, monkeypatch):
+    """main.app wired to the fakes, with process-wide state reset; not started."""
+    _clear_process_state()
+    catalog = main.PlaceCatalog()
+    for name, factory in main.place_catalog._index_factories.items():
+        catalog.add_index(name, factory)
+    monkeypatch.setattr(main, "place_catalog", catalog)
+    monkeypatch.setattr(main, "response_cache", main._create_response_cache())
+    monkeypatch.setattr(main, "_create_supabase_http_client", lambda: httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=postgrest), base_url="http://fake-postgrest",
+    ))
+
+    def open_gateway():
+        gateway = main.razorpay_gateway
+        gateway._http = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=razorpay), base_url=gateway.base_url,
+            auth=(gateway.key_id, gateway._key_secret),
+        )
+
+    monkeypatch.setattr(main.razorpay_gateway, "open", open_gateway)
+    yield main.app
+    _clear_process_state()
+
+
+@pytest.fixture
+def client(app):
+    """TestClient running the app lifespan against the fakes."""
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def user(store):
+    return store.tables["users"][0]
+
+
+@pytest.fixture
+def auth_headers(user):
+    return {"Authorization": f"Bearer {main._create_token(user['id'])}"}
+
+
+def razorpay_signature(order_id: str, payment_id: str) -> str:
+    return hmac.new(
+        main.RAZORPAY_KEY_SECRET.encode(), f"{order_id}|{payment_id}".encode(), hashlib.sha256
+    ).hexdigest()
@@ -0,0 +1,86 @@
+"""Token-bucket rate limits and the concurrency limiter."""
+
+import asyncio
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def limited(client, monkeypatch):
+    """Rate limiting on, with tight budgets that barely refill during a test."""
+    monkeypatch.setattr(main, "rate_limit_backend", main.MemoryRateLimitBackend(1000))
+    monkeypatch.setitem(main.RATE_LIMIT_BUDGETS, "default", (1, 5))
+    monkeypatch.setitem(main.RATE_LIMIT_BUDGETS, "search", (1, 2))
+    return client
+
+
+def test_over_budget_gets_429_with_retry_after(limited):
+    codes = [limited.get("/api/places/search", params={"q": "Goa"}).status_code for _ in range(2)]
+    rejected = limited.get("/api/places/search", params={"q": "Goa"})
+
+    assert codes == [200, 200]
+    assert rejected.status_code == 429
+    assert int(rejected.headers["retry-after"]) >= 1
+    assert rejected.json() == {"detail": "Too many requests"}
+
+
+def test_rejections_carry_cors_headers(limited):
+    origin = {"Origin": "http://localhost:5173"}
+    for _ in range(2):
+        limited.get("/api/places/search", params={"q": "Goa"}, headers=origin)
+
+    rejected = limited.get("/api/places/search", params={"q": "Goa"}, headers=origin)
+
+    assert rejected.status_code == 429
+    assert rejected.headers["access-control-allow-origin"] == "http://localhost:5173"
+
+
+def test_budgets_are_separate_per_route_class(limited):
+    for _ in range(2):
+        limited.get("/api/places/search", params={"q": "Goa"})
+    assert limited.get("/api/places/search", params={"q": "Goa"}).status_code == 429
+
+    assert limited.get("/api/places/featured").status_code == 200
+
+
+def test_users_and_anonymous_callers_have_separate_buckets(limited, auth_headers):
+    for _ in range(2):
+        limited.get("/api/places/search", params={"q": "Goa"})
+    assert limited.get("/api/places/search", params={"q": "Goa"}).status_code == 429
+
+    assert limited.get("/api/places/search", params={"q": "Goa"}, headers=auth_headers).status_code == 200
+
+
+def test_large_pages_cost_more_tokens(limited):
+    assert limited.get("/api/places", params={"limit": 500}).status_code == 200
+    assert limited.get("/api/places", params={"limit": 100}).status_code == 429
+
+
+def test_probes_are_exempt(limited):
+    for _ in range(10):
+        assert limited.get("/health").status_code == 200
+
+
+def test_concurrency_limiter_sheds_after_queue_timeout():
+    async def scenario():
+        limiter = main.ConcurrencyLimiter(limit=2, max_queue=1, queue_timeout=0.05)
+
+        async def job():
+            if not await limiter.acquire():
+                return "shed"
+            try:
+                await asyncio.sleep(0.2)
+                return "ok"
+            finally:
+                limiter.release()
+
+        results = await asyncio.gather(*(job() for _ in range(5)))
+        return results, limiter.stats()
+
+    results, stats = asyncio.run(scenario())
+
+    assert sorted(results) == ["ok", "ok", "shed", "shed", "shed"]
+    assert stats["active"] == stats["waiting"] == 0
+    assert stats["rejected"] == 3
@@ -0,0 +1,73 @@
+"""Login against every stored password format, and rehash on success."""
+
+import hashlib
+import os
+
+import pytest
+
+import main
+from bench.data import BENCH_PASSWORD
+
+
+def _legacy(password: str) -> str:
+    salt = os.urandom(8).hex()
+    return f"{salt}:{main._legacy_sha256(password, salt)}"
+
+
+def _pbkdf2(password: str, iterations: int = 1000) -> str:
+    salt = os.urandom(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+    return f"pbkdf2_sha256${iterations}${salt.hex()}${digest.hex()}"
+
+
+def _scrypt(password: str, n: int = 2**10) -> str:
+    salt = os.urandom(16)
+    digest = hashlib.scrypt(password.encode(), salt=salt, n=n, r=8, p=1)
+    return f"scrypt${n}$8$1${salt.hex()}${digest.hex()}"
+
+
+STORED_FORMATS = {
+    "plain": lambda password: password,
+    "legacy": _legacy,
+    "pbkdf2": _pbkdf2,
+    "scrypt-weaker": _scrypt,
+}
+
+
+def _login(client, user, password=BENCH_PASSWORD):
+    return client.post("/api/auth/login", json={"email": user["email"], "password": password})
+
+
+@pytest.mark.parametrize("stored_format", STORED_FORMATS)
+def test_login_rehashes_outdated_formats(client, user, stored_format):
+    user["password_hash"] = STORED_FORMATS[stored_format](BENCH_PASSWORD)
+
+    response = _login(client, user)
+
+    assert response.status_code == 200, response.text
+    assert not main._password_needs_rehash(user["password_hash"])
+    assert main._verify_password(BENCH_PASSWORD, user["password_hash"])
+    assert "password_hash" not in response.json()["user"]
+
+
+@pytest.mark.parametrize("stored_format", STORED_FORMATS)
+def test_wrong_password_is_rejected_without_rehash(client, user, stored_format):
+    stored = user["password_hash"] = STORED_FORMATS[stored_format](BENCH_PASSWORD)
+
+    response = _login(client, user, password="not-the-password")
+
+    assert response.status_code == 401
+    assert user["password_hash"] == stored
+
+
+def test_current_hash_is_left_alone(client, user):
+    stored = user["password_hash"]
+    assert not main._password_needs_rehash(stored)
+
+    assert _login(client, user).status_code == 200
+    assert user["password_hash"] == stored
+
+
+def test_malformed_hash_does_not_verify():
+    assert not main._verify_password(BENCH_PASSWORD, "scrypt$not$a$valid$hash")
+    assert not main._verify_password(BENCH_PASSWORD, "pbkdf2_sha256$x$00$00")
@@ -0,0 +1,96 @@
+"""Order creation and idempotent payment verification."""
+
+import main
+from conftest import razorpay_signature
+
+
+def _book(client, auth_headers, place_id: str, guests: int = 2) -> tuple[dict, dict]:
+    body = {"place_id": place_id, "booking_date_time": "2026-12-01T10:00:00+00:00", "number_of_guests": guests}
+    order = client.post("/api/bookings", json=body, headers=auth_headers)
+    assert order.status_code == 200, order.text
+    return body, order.json()
+
+
+def _verify_body(body: dict, order: dict, payment_id: str = "pay_test_1") -> dict:
+    return {
+        **body,
+        "booking_ref": order["booking_ref"],
+        "amount_paid": order["amount_paid"],
+        "razorpay_order_id": order["razorpay_order_id"],
+        "razorpay_payment_id": payment_id,
+        "razorpay_signature": razorpay_signature(order["razorpay_order_id"], payment_id),
+    }
+
+
+def _bookable(store) -> dict:
+    return next(p for p in store.tables["places"] if p["visible"] and p["avg_price"])
+
+
+def test_verify_twice_records_one_booking(client, store, auth_headers):
+    body, order = _book(client, auth_headers, _bookable(store)["id"])
+    verify = _verify_body(body, order)
+
+    first = client.post("/api/bookings/verify", json=verify, headers=auth_headers)
+    main._confirmed_bookings.clear()  # as if the retry landed on another worker
+    second = client.post("/api/bookings/verify", json=verify, headers=auth_headers)
+
+    assert first.status_code == second.status_code == 200
+    assert first.json()["data"]["id"] == second.json()["data"]["id"]
+    rows = [row for row in store.tables["bookings"] if row["razorpay_order_id"] == order["razorpay_order_id"]]
+    assert len(rows) == 1
+
+
+def test_repeat_verify_is_served_without_database_writes(client, store, auth_headers):
+    body, order = _book(client, auth_headers, _bookable(store)["id"])
+    verify = _verify_body(body, order)
+    client.post("/api/bookings/verify", json=verify, headers=auth_headers)
+    bookings_before = len(store.tables["bookings"])
+
+    again = client.post("/api/bookings/verify", json=verify, headers=auth_headers)
+
+    assert again.status_code == 200
+    assert len(store.tables["bookings"]) == bookings_before
+
+
+def test_verify_by_another_user_is_forbidden(client, store, auth_headers):
+    body, order = _book(client, auth_headers, _bookable(store)["id"])
+    other = {"Authorization": f"Bearer {main._create_token(store.tables['users'][1]['id'])}"}
+
+    response = client.post("/api/bookings/verify", json=_verify_body(body, order), headers=other)
+
+    assert response.status_code == 403
+
+
+def test_mismatched_booking_details_are_rejected(client, store, auth_headers):
+    body, order = _book(client, auth_headers, _bookable(store)["id"], guests=2)
+
+    response = client.post(
+        "/api/bookings/verify", json={**_verify_body(body, order), "number_of_guests": 3}, headers=auth_headers
+    )
+
+    assert response.status_code == 400
+
+
+def test_fractional_prices_verify_and_record_the_order_amount(client, store, auth_headers):
+    place = _bookable(store)
+    place["avg_price"] = 1.14
+    store.changed("places")
+    body, order = _book(client, auth_headers, place["id"], guests=1)
+
+    assert order["amount"] == 114
+    response = client.post(
+        "/api/bookings/verify", json={**_verify_body(body, order), "amount_paid": 0.01}, headers=auth_headers
+    )
+
+    assert response.status_code == 200
+    assert response.json()["data"]["amount_paid"] == 1.14
+
+
+def test_bad_signature_is_rejected(client, store, auth_headers):
+    body, order = _book(client, auth_headers, _bookable(store)["id"])
+
+    response = client.post(
+        "/api/bookings/verify", json={**_verify_body(body, order), "razorpay_signature": "0" * 64}, headers=auth_headers
+    )
+
+    assert response.status_code == 400
@@ -0,0 +1,63 @@
+"""ETags, 304s and pre-compressed variants of cached responses."""
+
+import pytest
+
+FEATURED = "/api/places/featured?limit=20"
+
+
+def test_gzip_variant_has_its_own_etag(client):
+    plain = client.get(FEATURED, headers={"Accept-Encoding": "identity"})
+    packed = client.get(FEATURED, headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in plain.headers
+    assert packed.headers["content-encoding"] == "gzip"
+    assert packed.headers["etag"] == plain.headers["etag"][:-1] + '-gzip"'
+    assert packed.json() == plain.json()
+
+
+@pytest.mark.parametrize("encoding", ["identity", "gzip"])
+def test_if_none_match_returns_304_for_any_variant_tag(client, encoding):
+    plain = client.get(FEATURED, headers={"Accept-Encoding": "identity"}).headers["etag"]
+    packed = client.get(FEATURED, headers={"Accept-Encoding": "gzip"}).headers["etag"]
+
+    for tag in (plain, packed, f"W/{packed}"):
+        response = client.get(FEATURED, headers={"Accept-Encoding": encoding, "If-None-Match": tag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert "content-encoding" not in response.headers
+
+
+def test_stale_etag_gets_full_body(client):
+    response = client.get(FEATURED, headers={"If-None-Match": '"not-the-current-tag"'})
+    assert response.status_code == 200
+    assert response.json()["data"]
+
+
+def test_uncached_json_is_compressed_by_middleware(client, store, user, auth_headers):
+    for n in range(10):
+        store.tables["bookings"].append({
+            "id": f"00000000-0000-4000-8000-{n:012d}", "user_id": user["id"],
+            "place_id": store.tables["places"][0]["id"], "booking_date_time": f"2026-03-{n + 1:02d}T10:00:00+00:00",
+            "booking_status": "CONFIRMED", "number_of_guests": 2,
+        })
+    store.changed("bookings")
+
+    raw = client.get("/api/bookings", headers={**auth_headers, "Accept-Encoding": "identity"})
+    response = client.get("/api/bookings", headers={**auth_headers, "Accept-Encoding": "gzip"})
+
+    assert len(raw.content) >= 1024
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == raw.headers["etag"][:-1] + '-gzip"'
+    assert response.json() == raw.json()
+    revalidated = client.get(
+        "/api/bookings", headers={**auth_headers, "Accept-Encoding": "gzip", "If-None-Match": response.headers["etag"]}
+    )
+    assert revalidated.status_code == 304
+
+
+@pytest.mark.parametrize("encoding", ["identity", "gzip"])
+def test_vary_lists_accept_encoding_once(client, encoding):
+    client.get(FEATURED)
+    for headers in ({}, {"If-None-Match": client.get(FEATURED).headers["etag"]}):
+        response = client.get(FEATURED, headers={"Accept-Encoding": encoding, **headers})
+        assert response.headers.get_list("vary") == ["Accept-Encoding"]
@@ -0,0 +1,22 @@
+"""OG page prerendering at startup."""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.mark.parametrize("preload", [True, False])
+def test_prerender_runs_with_and_without_catalog_preload(app, monkeypatch, preload):
+    monkeypatch.setattr(main, "OG_PRERENDER_ON_STARTUP", True)
+    monkeypatch.setattr(main, "PRELOAD_PLACE_CATALOG", preload)
+
+    with TestClient(app) as client:
+        for _ in range(100):
+            if len(main._og_cache):
+                break
+            client.portal.call(asyncio.sleep, 0.02)
+
+        assert len(main._og_cache) == len(main.place_catalog.rows) > 0
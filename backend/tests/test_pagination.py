@@ -0,0 +1,88 @@
+"""Keyset cursors must visit every row exactly once, NULL sort keys included."""
+
+import pytest
+
+
+def _walk(client, url: str, params: dict, headers: dict | None = None) -> list[dict]:
+    rows, cursor = [], None
+    for _ in range(100):
+        page = client.get(url, params={**params, **({"cursor": cursor} if cursor else {})}, headers=headers)
+        assert page.status_code == 200, page.text
+        body = page.json()
+        rows += body["data"]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return rows
+    pytest.fail("cursor pagination did not terminate")
+
+
+@pytest.mark.parametrize("sort", ["id", "name", "rating", "updated_at"])
+def test_place_cursor_pages_cover_every_visible_place(client, store, sort):
+    for place in store.tables["places"][::5]:
+        place["rating"] = None
+    store.changed("places")
+
+    rows = _walk(client, "/api/places", {"pagination": "cursor", "sort": sort, "limit": 7})
+
+    ids = [row["id"] for row in rows]
+    assert len(ids) == len(set(ids))
+    assert set(ids) == {place["id"] for place in store.tables["places"] if place["visible"]}
+
+
+def test_place_cursor_rejects_a_cursor_for_another_sort(client):
+    first = client.get("/api/places", params={"pagination": "cursor", "sort": "name", "limit": 5}).json()
+    response = client.get("/api/places", params={"sort": "rating", "cursor": first["next_cursor"]})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("when", ["all", "upcoming", "past"])
+def test_booking_cursor_pages_cover_every_booking(client, store, user, auth_headers, when):
+    for day in range(12):
+        store.tables["bookings"].append({
+            "id": f"00000000-0000-4000-8000-{day:012d}",
+            "user_id": user["id"],
+            "place_id": store.tables["places"][0]["id"],
+            "booking_date_time": f"20{25 + day % 3}-0{1 + day % 9}-1{day % 10}T10:00:00+00:00",
+            "booking_status": "CONFIRMED",
+            "number_of_guests": 1,
+        })
+    store.changed("bookings")
+    full = client.get("/api/bookings", params={"when": when}, headers=auth_headers).json()["data"]
+
+    rows = _walk(client, "/api/bookings", {"when": when, "limit": 4}, headers=auth_headers)
+
+    assert [row["id"] for row in rows] == [row["id"] for row in full]
+    assert len(full) >= 4
+
+
+def test_bookings_without_limit_returns_everything(client, store, user, auth_headers):
+    expected = [row for row in store.tables["bookings"] if row["user_id"] == user["id"]]
+
+    body = client.get("/api/bookings", headers=auth_headers).json()
+
+    assert body["count"] == len(expected)
+    assert body["next_cursor"] is None
+
+
+@pytest.mark.parametrize("when", ["all", "upcoming"])
+def test_booking_cursor_pages_include_null_dates_once(client, store, user, auth_headers, when):
+    for n in range(9):
+        store.tables["bookings"].append({
+            "id": f"00000000-0000-4000-9000-{n:012d}",
+            "user_id": user["id"],
+            "place_id": store.tables["places"][0]["id"],
+            "booking_date_time": None if n % 3 == 0 else f"2027-0{1 + n}-01T10:00:00+00:00",
+            "booking_status": "PENDING",
+            "number_of_guests": 1,
+        })
+    store.changed("bookings")
+    full = client.get("/api/bookings", params={"when": when}, headers=auth_headers).json()["data"]
+
+    rows = _walk(client, "/api/bookings", {"when": when, "limit": 2}, headers=auth_headers)
+
+    ids = [row["id"] for row in rows]
+    assert ids == [row["id"] for row in full]
+    assert len(ids) == len(set(ids))
+    dated = [row["booking_date_time"] for row in rows if row["booking_date_time"] is not None]
+    assert dated == sorted(dated, reverse=when == "all")
+    assert all(row["booking_date_time"] is None for row in rows[len(dated):])
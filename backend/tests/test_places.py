@@ -0,0 +1,39 @@
+"""Field projection on the place listing endpoints."""
+
+import pytest
+
+import main
+
+
+@pytest.mark.parametrize("url", ["/api/places", "/api/places/featured"])
+def test_projection_returns_only_requested_fields(client, url):
+    response = client.get(url, params={"fields": "name,city"})
+
+    assert response.status_code == 200, response.text
+    assert {tuple(row) for row in response.json()["data"]} == {("id", "name", "city")}
+
+
+def test_unknown_field_is_rejected_before_querying(client):
+    response = client.get("/api/places", params={"fields": "name,owner_email"})
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Unknown fields: owner_email"}
+
+
+@pytest.mark.parametrize("url", ["/api/places", "/api/places/featured", "/api/places/search?q=Goa"])
+def test_allowed_field_missing_from_the_table_is_a_400_naming_it(client, monkeypatch, url):
+    monkeypatch.setattr(main.place_catalog, "ready", False)
+
+    response = client.get(url, params={"fields": "name,website"})
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Field not available: website"}
+
+
+def test_missing_field_on_favorites_fallback_is_a_400(client, monkeypatch, auth_headers):
+    monkeypatch.setattr(main.place_catalog, "ready", False)
+
+    response = client.get("/api/favorites/places", params={"fields": "amenities"}, headers=auth_headers)
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Field not available: amenities"}